@@ -2,10 +2,19 @@ import importlib
 import pkgutil
 from fastapi import APIRouter
 
-api_router = APIRouter()
 
-for loader, module_name, is_pkg in pkgutil.walk_packages(__path__):
-    module = importlib.import_module(f".{module_name}.router", package=__package__)
+def get_api_router() -> APIRouter:
+    """
+    导入各子模块的 router 并汇总。
+    子模块导入时会加载数据并启动目录监控，因此不在包导入时执行，
+    以便加载工作进程可以导入 app.api 下无副作用的模块。
+    """
+    api_router = APIRouter()
 
-    if hasattr(module, "router"):
-        api_router.include_router(module.router, prefix=f"/{module_name}")
+    for loader, module_name, is_pkg in pkgutil.walk_packages(__path__):
+        module = importlib.import_module(f".{module_name}.router", package=__package__)
+
+        if hasattr(module, "router"):
+            api_router.include_router(module.router, prefix=f"/{module_name}")
+
+    return api_router
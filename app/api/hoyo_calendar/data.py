@@ -1,45 +1,122 @@
 import json
 from pathlib import Path
+from typing import NamedTuple
 
+from app.core.artifact import Artifact
 from app.core.base_data import BaseData
 
+from .events import BIRTHDAY_TYPE
+from .index import (
+    BirthdayIndex,
+    CharacterSuggestIndex,
+    EventTimeIndex,
+    build_birthday_indexes,
+    build_character_index,
+)
+
+
+class CalendarSnapshot(NamedTuple):
+    """
+    某一时刻的完整日历数据，构建完成后不再修改。
+    文件变更时生成新的快照并整体替换，请求处理时只需读取一次 data.snapshot。
+    - json: 游戏 -> 事件类型 -> 事件列表
+    - ics: 游戏 -> 事件类型 -> ICS 文件内容（常驻内存，含预压缩版本）
+    - time_index: 游戏 -> 事件类型 -> 事件时间索引，随 json 一同更新
+    - characters: 角色名 -> {游戏: 生日数据}，生日数据变更时重新构建
+    - birthdays: 游戏 -> 按 (月, 日) 排序的生日索引，None 为全部游戏，同上
+    - character_suggest: 角色名补全索引，同上
+    """
+
+    json: dict[str, dict[str, list]]
+    ics: dict[str, dict[str, Artifact]]
+    time_index: dict[str, dict[str, EventTimeIndex]]
+    characters: dict[str, dict[str, dict]]
+    birthdays: dict[str | None, BirthdayIndex]
+    character_suggest: CharacterSuggestIndex
+
+
+def _replace_item(
+    file_type_data: dict[str, dict], game: str, data_type: str, value
+) -> dict[str, dict]:
+    """复制外层字典，只替换 game/data_type 对应的值"""
+    game_data = {**file_type_data.get(game, {}), data_type: value}
+    return {**file_type_data, game: game_data}
+
+
+def _remove_item(
+    file_type_data: dict[str, dict], game: str, data_type: str
+) -> dict[str, dict]:
+    game_data = {
+        name: value for name, value in file_type_data[game].items() if name != data_type
+    }
+    return {**file_type_data, game: game_data}
+
+
+def _birthday_indexes(json_data: dict[str, dict[str, list]]) -> dict:
+    """由生日数据构建的各项索引，生日数据变更时整体重建"""
+    characters = build_character_index(json_data)
+    return {
+        "characters": characters,
+        "birthdays": build_birthday_indexes(json_data),
+        "character_suggest": CharacterSuggestIndex(characters),
+    }
+
 
 class HoyoCalendarData(BaseData):
+    snapshot = CalendarSnapshot(
+        json={},
+        ics={},
+        time_index={},
+        characters={},
+        birthdays={},
+        character_suggest=CharacterSuggestIndex({}),
+    )
+
     def load_file(self, file_path: Path) -> None:
         relative_path = file_path.relative_to(self.watch_dir)
         file_type, game, _ = relative_path.parts
         data_type = file_path.stem
 
-        if not hasattr(self, file_type):
-            setattr(self, file_type, {})
-        file_type_data = getattr(self, file_type)
-
-        if game not in file_type_data:
-            file_type_data[game] = {}
-
         match file_type:
             case "json":
                 f = file_path.open("r", encoding="utf-8")
                 data = json.load(f)
-                file_type_data[game][data_type] = data
                 f.close()
+                json_data = _replace_item(self.snapshot.json, game, data_type, data)
+                time_index = _replace_item(
+                    self.snapshot.time_index, game, data_type, EventTimeIndex(data)
+                )
+                changes = {"json": json_data, "time_index": time_index}
+                if data_type == BIRTHDAY_TYPE:
+                    changes.update(_birthday_indexes(json_data))
+                self.snapshot = self.snapshot._replace(**changes)
             case "ics":
-                abs_path = str(file_path.resolve())
-                file_type_data[game][data_type] = abs_path
+                artifact = Artifact.from_file(file_path)
+                ics_data = _replace_item(self.snapshot.ics, game, data_type, artifact)
+                self.snapshot = self.snapshot._replace(ics=ics_data)
 
     def on_file_deleted(self, file_path: Path) -> None:
         relative_path = file_path.relative_to(self.watch_dir)
         file_type, game, _ = relative_path.parts
         data_type = file_path.stem
 
-        if not hasattr(self, file_type):
-            return
-        file_type_data = getattr(self, file_type)
-
-        if game not in file_type_data:
-            return
+        match file_type:
+            case "json":
+                fields = ("json", "time_index")
+            case "ics":
+                fields = ("ics",)
+            case _:
+                return
 
-        del file_type_data[game][data_type]
+        changes = {}
+        for field in fields:
+            file_type_data = getattr(self.snapshot, field)
+            if game in file_type_data:
+                changes[field] = _remove_item(file_type_data, game, data_type)
+        if "json" in changes and data_type == BIRTHDAY_TYPE:
+            changes.update(_birthday_indexes(changes["json"]))
+        if changes:
+            self.snapshot = self.snapshot._replace(**changes)
 
 
 data = HoyoCalendarData("hoyo_calendar")
@@ -0,0 +1,89 @@
+# 日历事件字段解析
+# 上游数据的字段名并不统一，这里集中处理常见的写法
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from app.core.config import app_config
+
+BIRTHDAY_TYPE = "生日"
+
+TITLE_KEYS = ("title", "name", "summary")
+START_KEYS = ("start_time", "start", "begin_time", "begin", "start_date")
+END_KEYS = ("end_time", "end", "finish_time", "end_date")
+BIRTHDAY_KEYS = ("birthday", "date", "birth")
+
+DATA_TIMEZONE = timezone(timedelta(hours=app_config.calendar_utc_offset))
+
+_MONTH_DAY_RE = re.compile(r"(?:\d{4}\D)?(\d{1,2})\D(\d{1,2})")
+
+
+def parse_time(value) -> datetime | None:
+    """
+    解析事件时间，支持时间戳（秒/毫秒）与 ISO 8601 格式字符串；
+    不带时区的时间按 calendar_utc_offset 处理。无法解析时返回 None
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        if value > 1e12:
+            value = value / 1000
+        try:
+            return datetime.fromtimestamp(value, timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            return None
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip().replace("/", "-"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=DATA_TIMEZONE)
+    return dt
+
+
+def _first(item: dict, keys: tuple[str, ...]):
+    for key in keys:
+        if item.get(key) not in (None, ""):
+            return item[key]
+    return None
+
+
+def event_title(item: dict) -> str:
+    title = _first(item, TITLE_KEYS)
+    return str(title) if title is not None else ""
+
+
+def event_range(item: dict) -> tuple[datetime | None, datetime | None]:
+    """事件的 (开始时间, 结束时间)；缺少结束时间时视为瞬时事件"""
+    start = parse_time(_first(item, START_KEYS))
+    end = parse_time(_first(item, END_KEYS))
+    if end is None:
+        end = start
+    return start, end
+
+
+def birthday_month_day(item: dict) -> tuple[int, int] | None:
+    """
+    解析生日的 (月, 日)，支持 month/day 字段以及 "MM-DD"、"M月D日"、
+    "YYYY-MM-DD" 等字符串写法。无法解析时返回 None
+    """
+    if "month" in item and "day" in item:
+        try:
+            month, day = int(item["month"]), int(item["day"])
+        except (TypeError, ValueError):
+            return None
+    else:
+        value = _first(item, BIRTHDAY_KEYS)
+        if not isinstance(value, str):
+            return None
+        match = _MONTH_DAY_RE.search(value)
+        if not match:
+            return None
+        month, day = int(match.group(1)), int(match.group(2))
+    # 按闰年校验，排除 4 月 31 日、2 月 30 日等不存在的日期，保留 2 月 29 日
+    try:
+        date(2000, month, day)
+    except ValueError:
+        return None
+    return month, day
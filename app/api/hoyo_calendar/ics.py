@@ -0,0 +1,112 @@
+# 根据已加载的日历 JSON 生成 ICS (RFC 5545) 内容
+import hashlib
+from datetime import datetime, timezone
+
+from .events import BIRTHDAY_TYPE, birthday_month_day, event_range, event_title
+
+PRODID = "-//hoyo-info-api//hoyo_calendar//ZH"
+# 生日按年重复，起始年份取闰年，保证 2 月 29 日有效
+_BIRTHDAY_BASE_YEAR = 2000
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """按 RFC 5545 将超过 75 字节的行折行，不拆分多字节字符"""
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    current = ""
+    current_size = 0
+    limit = 75
+    for char in line:
+        char_size = len(char.encode("utf-8"))
+        if current_size + char_size > limit:
+            parts.append(current)
+            current, current_size = "", 0
+            # 续行以一个空格开头，占用 1 字节
+            limit = 74
+        current += char
+        current_size += char_size
+    parts.append(current)
+    return "\r\n ".join(parts)
+
+
+def _format_utc(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _uid(*parts: str) -> str:
+    digest = hashlib.blake2b("\x1f".join(parts).encode(), digest_size=12)
+    return f"{digest.hexdigest()}@hoyo-info-api"
+
+
+def _event_lines(
+    game: str, data_type: str, item: dict, dtstamp: str
+) -> list[str] | None:
+    title = event_title(item)
+    summary = f"【{game}】{title}" if title else f"【{game}】{data_type}"
+    if data_type == BIRTHDAY_TYPE:
+        month_day = birthday_month_day(item)
+        if month_day is None:
+            return None
+        month, day = month_day
+        return [
+            "BEGIN:VEVENT",
+            f"UID:{_uid(game, data_type, title)}",
+            f"DTSTAMP:{dtstamp}",
+            f"DTSTART;VALUE=DATE:{_BIRTHDAY_BASE_YEAR}{month:02d}{day:02d}",
+            "RRULE:FREQ=YEARLY",
+            f"SUMMARY:{_escape(f'{summary}生日')}",
+            "TRANSP:TRANSPARENT",
+            "END:VEVENT",
+        ]
+
+    start, end = event_range(item)
+    if start is None:
+        return None
+    return [
+        "BEGIN:VEVENT",
+        f"UID:{_uid(game, data_type, title, start.isoformat())}",
+        f"DTSTAMP:{dtstamp}",
+        f"DTSTART:{_format_utc(start)}",
+        f"DTEND:{_format_utc(max(start, end))}",
+        f"SUMMARY:{_escape(summary)}",
+        f"CATEGORIES:{_escape(data_type)}",
+        "END:VEVENT",
+    ]
+
+
+def render_calendar(
+    name: str,
+    events: list[tuple[str, str, dict]],
+    dtstamp: datetime,
+) -> bytes:
+    """
+    将 (游戏, 事件类型, 事件数据) 列表渲染为 ICS 文件内容。
+    无法解析时间的事件会被跳过。
+    """
+    stamp = _format_utc(dtstamp)
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "METHOD:PUBLISH",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ]
+    for game, data_type, item in events:
+        event_lines = _event_lines(game, data_type, item, stamp)
+        if event_lines:
+            lines.extend(event_lines)
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode("utf-8")
@@ -0,0 +1,161 @@
+# 日历事件索引，在 JSON 文件加载时构建
+from bisect import bisect_left, bisect_right
+from itertools import chain, islice
+
+from app.utils.pinyin import pinyin_keys
+from app.utils.prefix_index import PrefixIndex
+
+from .events import BIRTHDAY_TYPE, birthday_month_day, event_range
+
+
+class EventTimeIndex:
+    """
+    单个事件列表的时间索引：
+    - starts / start_positions: 按开始时间排序的时间戳及其在原列表中的下标
+    - ends / end_positions: 按结束时间排序的时间戳及其在原列表中的下标
+    - spans: 原列表下标 -> (开始时间戳, 结束时间戳)
+    无法解析开始时间的事件（如生日）不进入索引。
+    """
+
+    __slots__ = ("starts", "start_positions", "ends", "end_positions", "spans")
+
+    def __init__(self, items: list) -> None:
+        spans = []
+        for position, item in enumerate(items):
+            if not isinstance(item, dict):
+                continue
+            start, end = event_range(item)
+            if start is None:
+                continue
+            start_ts = start.timestamp()
+            spans.append((start_ts, max(start_ts, end.timestamp()), position))
+
+        by_start = sorted(spans, key=lambda span: span[0])
+        by_end = sorted(spans, key=lambda span: span[1])
+        self.starts = [span[0] for span in by_start]
+        self.start_positions = [span[2] for span in by_start]
+        self.ends = [span[1] for span in by_end]
+        self.end_positions = [span[2] for span in by_end]
+        self.spans = {span[2]: (span[0], span[1]) for span in spans}
+
+    def overlapping(self, start: float | None, end: float | None) -> list[int]:
+        """
+        返回与时间段 [start, end] 有交集的事件在原列表中的下标（按原顺序），
+        start / end 为 None 表示不限制。
+        开始时间 <= end 的事件是按开始时间排序后的前缀，结束时间 >= start 的
+        事件是按结束时间排序后的后缀，只需遍历较短的一段并检查另一个条件。
+        """
+        start_count = (
+            len(self.starts) if end is None else bisect_right(self.starts, end)
+        )
+        end_from = 0 if start is None else bisect_left(self.ends, start)
+
+        if start_count <= len(self.ends) - end_from:
+            positions = [
+                position
+                for position in self.start_positions[:start_count]
+                if start is None or self.spans[position][1] >= start
+            ]
+        else:
+            positions = [
+                position
+                for position in self.end_positions[end_from:]
+                if end is None or self.spans[position][0] <= end
+            ]
+        positions.sort()
+        return positions
+
+
+def build_character_index(
+    json_data: dict[str, dict[str, list]],
+) -> dict[str, dict[str, dict]]:
+    """
+    由各游戏的生日数据构建角色索引：角色名 -> {游戏: 生日数据}。
+    游戏按 json_data 中的顺序排列；同一游戏中重名时取第一条
+    """
+    index: dict[str, dict[str, dict]] = {}
+    for game, game_data in json_data.items():
+        for item in game_data.get(BIRTHDAY_TYPE) or ():
+            if not isinstance(item, dict):
+                continue
+            games = index.setdefault(item.get("name", ""), {})
+            games.setdefault(game, item)
+    return index
+
+
+class BirthdayIndex:
+    """
+    按 (月, 日) 排序的生日列表，用于查询某一天之后最近的生日：
+    - keys: 排序后的 (月, 日)
+    - entries: 与 keys 一一对应的 (游戏, 生日数据)
+    无法解析日期的生日数据不进入索引。
+    """
+
+    __slots__ = ("keys", "entries")
+
+    def __init__(self, birthdays: list[tuple[str, dict]]) -> None:
+        parsed = []
+        for game, item in birthdays:
+            month_day = birthday_month_day(item)
+            if month_day is not None:
+                parsed.append((month_day, game, item))
+        # 同一天的生日保持原有顺序
+        parsed.sort(key=lambda entry: entry[0])
+        self.keys = [entry[0] for entry in parsed]
+        self.entries = [(entry[1], entry[2]) for entry in parsed]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def on(self, month: int, day: int) -> range:
+        """(month, day) 当天的生日的下标"""
+        return range(
+            bisect_left(self.keys, (month, day)), bisect_right(self.keys, (month, day))
+        )
+
+    def upcoming(self, month: int, day: int, limit: int) -> list[int]:
+        """从 (month, day) 当天起最近的 limit 个生日的下标，跨年后从年初继续"""
+        start = bisect_left(self.keys, (month, day))
+        positions = chain(range(start, len(self.keys)), range(start))
+        return list(islice(positions, limit))
+
+
+def build_birthday_indexes(
+    json_data: dict[str, dict[str, list]],
+) -> dict[str | None, BirthdayIndex]:
+    """各游戏的生日索引，键 None 对应包含所有游戏的全局索引"""
+    birthdays = {
+        game: [
+            (game, item)
+            for item in game_data.get(BIRTHDAY_TYPE) or ()
+            if isinstance(item, dict)
+        ]
+        for game, game_data in json_data.items()
+    }
+    indexes: dict[str | None, BirthdayIndex] = {
+        game: BirthdayIndex(items) for game, items in birthdays.items()
+    }
+    indexes[None] = BirthdayIndex(list(chain.from_iterable(birthdays.values())))
+    return indexes
+
+
+class CharacterSuggestIndex:
+    """
+    角色名输入补全：可匹配角色名、全拼及拼音首字母的开头。
+    收录该角色的游戏越多越靠前。
+    """
+
+    __slots__ = ("names", "prefix_index")
+
+    def __init__(self, characters: dict[str, dict[str, dict]]) -> None:
+        self.names = [name for name in characters if name]
+        entries = []
+        for i, name in enumerate(self.names):
+            entries.append((name.lower(), i))
+            entries.extend((key, i) for key in pinyin_keys(name))
+        self.prefix_index = PrefixIndex(
+            entries, [len(characters[name]) for name in self.names]
+        )
+
+    def suggest(self, prefix: str, limit: int) -> list[str]:
+        return [self.names[i] for i in self.prefix_index.suggest(prefix.lower(), limit)]
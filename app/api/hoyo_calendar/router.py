@@ -1,12 +1,20 @@
-from fastapi import APIRouter, HTTPException, Path, Query, status
-from fastapi.responses import FileResponse
+from datetime import date, datetime
+from urllib.parse import quote
 
+from fastapi import APIRouter, HTTPException, Path, Query, Request, status
+
+from app.core.artifact import Artifact
+from app.core.response_cache import ResponseCache
+from app.middleware.http_cache import self_validating
 from app.utils.logger import get_logger
+from app.utils.prefix_index import MAX_SUGGESTIONS
 
 from . import schemas, services
+from .data import data
 
 router = APIRouter(tags=["游戏日历订阅"])
 logger = get_logger("API_CAL")
+response_cache = ResponseCache(data)
 
 
 @router.get(
@@ -37,13 +45,16 @@ logger = get_logger("API_CAL")
         500: {"description": "服务器内部错误"},
     },
 )
-async def list_games() -> schemas.GameListResponse:
-    try:
+async def list_games(request: Request) -> schemas.GameListResponse:
+    async def build():
         game_list = await services.list_games()
         return schemas.GameListResponse(
             total=len(game_list),
             items=game_list,
         )
+
+    try:
+        return await response_cache.get_or_build(request, ("list_games",), build)
     except Exception as e:
         logger.error(f"获取游戏名列表异常: {e}")
         raise HTTPException(
@@ -80,14 +91,20 @@ async def list_games() -> schemas.GameListResponse:
     },
 )
 async def list_event_types(
+    request: Request,
     game: str = Path(..., description="游戏名称"),
 ) -> schemas.EventTypeListResponse:
-    try:
+    async def build():
         type_list = await services.list_event_types(game)
         return schemas.EventTypeListResponse(
             total=len(type_list),
             items=type_list,
         )
+
+    try:
+        return await response_cache.get_or_build(
+            request, ("list_event_types", game), build
+        )
     except KeyError:
         logger.error(f"游戏 {game} 不存在")
         raise HTTPException(
@@ -119,6 +136,13 @@ async def list_event_types(
 - `limit`：要获取的数据数量（默认20，最大100）
 - 返回的数据范围：`[offset, offset + limit)`
 
+**按时间筛选**：
+- `start` / `end`：只返回与该时间段有交集的事件
+- `active_at`：只返回在该时刻进行中的事件
+- 时间为 ISO 8601 格式，不带时区时按数据所属时区（默认 UTC+8）处理
+- 使用时间筛选时，无法解析时间的事件（如生日）不会返回
+- 分页作用于筛选后的结果
+
 **注意事项**：
 - 如果游戏或事件类型不存在，返回404
 - 如果offset超出数据范围，返回空列表
@@ -141,6 +165,7 @@ async def list_event_types(
     },
 )
 async def get_event_data(
+    request: Request,
     game: str = Path(..., description="游戏名称"),
     data_type: str = Path(..., description="事件类型"),
     offset: int = Query(0, ge=0, description="偏移量，从第几条开始"),
@@ -150,20 +175,38 @@ async def get_event_data(
         le=100,
         description="每页数量（默认20，最大100）",
     ),
+    start: datetime | None = Query(
+        None, description="时间段开始，如 2025-01-01T00:00:00"
+    ),
+    end: datetime | None = Query(None, description="时间段结束"),
+    active_at: datetime | None = Query(None, description="只返回该时刻进行中的事件"),
 ) -> schemas.EventListResponse:
-    try:
-        data_list = await services.get_event_data(game, data_type)
-
-        # 分页处理
-        total = len(data_list)
-        if limit > 0:
-            items = data_list[offset : offset + limit]
-        else:
-            items = data_list[offset:]
+    async def build():
+        return await services.get_event_page(
+            game, data_type, offset, limit, start, end, active_at
+        )
 
-        return schemas.EventListResponse(
-            total=total, items=items, offset=offset, limit=limit
+    large_page = limit >= services.LARGE_PAGE_SIZE
+    try:
+        # 大分页按耗时请求限流（仅在未命中缓存时）
+        return await response_cache.get_or_build(
+            request,
+            (
+                "get_event_data",
+                game,
+                data_type,
+                offset,
+                limit,
+                start,
+                end,
+                active_at,
+            ),
+            build,
+            offload=large_page,
+            expensive=large_page,
         )
+    except HTTPException:
+        raise
     except KeyError:
         logger.error(f"游戏 {game} 或事件类型 {data_type} 不存在")
         raise HTTPException(
@@ -178,6 +221,61 @@ async def get_event_data(
         )
 
 
+@router.get(
+    "/events/active",
+    response_model=schemas.ActiveEventListResponse,
+    summary="获取进行中的事件",
+    description="""
+返回所有游戏（或指定游戏）中在指定时刻进行中的事件，默认为当前时间。
+
+**参数说明：**
+- `at`：查询时刻，ISO 8601 格式，不带时区时按数据所属时区（默认 UTC+8）处理
+- `games`：游戏名称，可重复传入多个；不传表示全部游戏
+- `types`：事件类型，可重复传入多个；不传表示全部类型
+
+**注意事项：**
+- 无法解析时间的事件（如生日）不会返回
+- 如果游戏不存在，返回 404
+""",
+    operation_id="cal_list_active_events",
+    responses={
+        200: {"description": "成功获取进行中的事件"},
+        404: {"description": "游戏不存在"},
+        500: {"description": "服务器内部错误"},
+    },
+)
+@self_validating("at")
+async def list_active_events(
+    request: Request,
+    at: datetime | None = Query(None, description="查询时刻，默认当前时间"),
+    games: list[str] | None = Query(None, description="游戏名称，可传入多个"),
+    types: list[str] | None = Query(None, description="事件类型，可传入多个"),
+) -> schemas.ActiveEventListResponse:
+    try:
+        items = await services.list_active_events(at, games, types)
+        result = schemas.ActiveEventListResponse(total=len(items), items=items)
+        if at is not None:
+            return result
+        # 默认查询当前时刻，结果随时间变化，不能使用数据集级别的校验信息：
+        # 按内容生成 ETag，并要求客户端每次重新校验
+        artifact = Artifact(result.model_dump_json().encode("utf-8"))
+        return await artifact.response(
+            request, "application/json", headers={"Cache-Control": "no-cache"}
+        )
+    except KeyError as e:
+        logger.error(f"查询进行中的事件时游戏不存在: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"游戏 {', '.join(games or [])} 中存在未收录的游戏",
+        )
+    except Exception as e:
+        logger.error(f"获取进行中的事件异常: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+
 @router.get(
     "/games/by-character",
     summary="获取角色所属游戏名列表",
@@ -216,6 +314,78 @@ async def get_games_by_character_name(
         )
 
 
+@router.get(
+    "/games/by-characters",
+    response_model=schemas.CharacterGamesListResponse,
+    summary="批量获取角色所属游戏名列表",
+    description="""
+一次查询多个角色所属的游戏名称列表，结果按传入顺序返回。
+
+**示例：**
+`/hoyo_calendar/games/by-characters?chars=芙宁娜&chars=流萤`
+
+**注意事项：**
+- 角色名称为中文，最多 100 个
+- 未收录的角色返回空列表，不会返回 404
+- 重复传入的角色只返回一次
+""",
+    operation_id="cal_get_games_batch",
+    responses={
+        200: {"description": "成功获取角色所属游戏名列表"},
+        500: {"description": "服务器内部错误"},
+    },
+)
+async def get_games_by_character_names(
+    chars: list[str] = Query(..., max_length=100, description="角色名称，可传入多个"),
+) -> schemas.CharacterGamesListResponse:
+    try:
+        games = await services.get_games_by_character_names(chars)
+        items = [
+            schemas.CharacterGamesInfo(char=char, games=char_games)
+            for char, char_games in games.items()
+        ]
+        return schemas.CharacterGamesListResponse(total=len(items), items=items)
+    except Exception as e:
+        logger.error(f"批量获取角色所属游戏列表异常: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+
+@router.get(
+    "/characters/suggest",
+    response_model=schemas.CharacterGamesListResponse,
+    summary="角色名输入补全",
+    description="""
+根据输入的前缀返回补全的角色名及其所属游戏，供边输入边查询使用。
+
+**匹配规则：**
+- 角色名开头，如 `芙宁` -> 芙宁娜
+- 全拼或拼音首字母开头，如 `funing`、`fnn` -> 芙宁娜
+- 不区分大小写，收录该角色的游戏越多越靠前
+""",
+    operation_id="cal_suggest_characters",
+    responses={
+        200: {"description": "成功获取补全结果"},
+        500: {"description": "服务器内部错误"},
+    },
+)
+async def suggest_characters(
+    q: str = Query(..., min_length=1, description="输入的前缀"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS, description="返回数量"),
+) -> schemas.CharacterGamesListResponse:
+    try:
+        items = await services.suggest_characters(q, limit)
+        return schemas.CharacterGamesListResponse(total=len(items), items=items)
+    except Exception as e:
+        logger.error(f"获取角色名补全异常: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+
 @router.get(
     "/{game}/birthday",
     summary="获取角色生日",
@@ -259,6 +429,112 @@ async def get_birthday(
         )
 
 
+@router.post(
+    "/birthdays/batch",
+    response_model=schemas.BirthdayBatchResponse,
+    summary="批量获取角色生日",
+    description="""
+一次查询多个角色的生日信息，结果与请求顺序一一对应。
+
+**请求体示例：**
+```json
+{
+    "items": [
+        {"char": "芙宁娜", "game": "原神"},
+        {"char": "流萤"}
+    ]
+}
+```
+
+**注意事项：**
+- 最多 100 个角色
+- 不指定 `game` 时返回该角色在所有游戏中的生日
+- 查不到的角色返回空列表，不会返回 404
+""",
+    operation_id="cal_get_birthdays",
+    responses={
+        200: {"description": "成功获取角色生日"},
+        500: {"description": "服务器内部错误"},
+    },
+)
+async def get_birthdays(
+    body: schemas.BirthdayBatchRequest,
+) -> schemas.BirthdayBatchResponse:
+    try:
+        items = await services.get_birthdays(body.items)
+        return schemas.BirthdayBatchResponse(total=len(items), items=items)
+    except Exception as e:
+        logger.error(f"批量获取角色生日异常: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+
+@router.get(
+    "/birthdays/upcoming",
+    response_model=schemas.UpcomingBirthdayListResponse,
+    summary="获取即将到来的角色生日",
+    description="""
+返回从指定日期（默认今天）起最近的若干个角色生日，跨年后从次年年初继续。
+
+**参数说明：**
+- `game`：游戏名称；不传表示全部游戏
+- `start`：起始日期，格式 YYYY-MM-DD，当天的生日也会返回
+- `limit`：返回数量（默认10，最大100）
+
+**返回字段：**
+- `date`：下一次生日的日期
+- `days_until`：距离起始日期的天数
+- `item`：原始生日数据
+
+**注意事项：**
+- 非闰年的 2 月 29 日生日按 3 月 1 日计算
+- 如果游戏不存在，返回 404
+""",
+    operation_id="cal_list_upcoming_birthdays",
+    responses={
+        200: {"description": "成功获取即将到来的生日"},
+        404: {"description": "游戏不存在"},
+        500: {"description": "服务器内部错误"},
+    },
+)
+@self_validating("start")
+async def list_upcoming_birthdays(
+    request: Request,
+    game: str | None = Query(None, description="游戏名称，不传表示全部游戏"),
+    start: date | None = Query(None, description="起始日期，默认今天"),
+    limit: int = Query(10, ge=1, le=100, description="返回数量（默认10，最大100）"),
+) -> schemas.UpcomingBirthdayListResponse:
+    start_date = start or services.calendar_today().date()
+
+    async def build():
+        items = await services.list_upcoming_birthdays(start_date, limit, game)
+        return schemas.UpcomingBirthdayListResponse(
+            total=len(items), start=start_date, items=items
+        )
+
+    try:
+        # 默认从今天起查询时结果每天变化，使用基于内容的 ETag
+        return await response_cache.get_or_build(
+            request,
+            ("list_upcoming_birthdays", game, start_date, limit),
+            build,
+            etag=start is None,
+        )
+    except KeyError:
+        logger.error(f"游戏 {game} 不存在")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"游戏 {game} 不存在"
+        )
+    except Exception as e:
+        logger.error(f"获取即将到来的生日异常: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+
 @router.get(
     "/ics",
     summary="导出日历文件",
@@ -278,25 +554,36 @@ async def get_birthday(
 **注意事项：**
 - 如果游戏或事件类型不存在，返回404
 - 如果文件生成失败，返回500
+- 支持 gzip/br 压缩及 ETag 缓存校验
 """,
     operation_id="cal_export_ics",
     responses={
         200: {"description": "成功获取日历文件", "content": {"text/calendar": {}}},
-        404: {"description": "游戏或事件类型不存在，或ICS文件不存在"},
+        404: {"description": "游戏或事件类型不存在"},
         500: {"description": "服务器内部错误"},
     },
 )
+@self_validating()
 async def get_ics(
+    request: Request,
     game: str = Query(..., description="游戏名称"),
     data_type: str = Query(..., description="事件类型"),
 ):
     try:
-        ics_path = await services.get_ics_path(game, data_type)
-        return FileResponse(
-            path=ics_path,
-            filename=f"{game}{data_type}日历.ics",
+        # 先读取修改时间再取数据，数据更新期间不会把新时间标记到旧内容上
+        last_modified = data.last_modified
+        ics = await services.get_ics(game, data_type)
+        filename = f"{game}{data_type}日历.ics"
+        quoted_filename = quote(filename)
+        if quoted_filename != filename:
+            content_disposition = f"attachment; filename*=utf-8''{quoted_filename}"
+        else:
+            content_disposition = f'attachment; filename="{filename}"'
+        return await ics.response(
+            request,
             media_type="text/calendar",
-            content_disposition_type="attachment",
+            headers={"Content-Disposition": content_disposition},
+            last_modified=last_modified,
         )
     except KeyError:
         logger.error(f"游戏 {game} 或事件类型 {data_type} 不存在")
@@ -304,14 +591,86 @@ async def get_ics(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"游戏 {game} 或事件类型 {data_type} 不存在",
         )
-    except FileNotFoundError:
-        logger.error(f"ICS文件 {ics_path} 不存在")
+    except Exception as e:
+        logger.error(f"获取游戏{data_type}数据异常: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal Server Error",
+        )
+
+
+@router.get(
+    "/ics/merged",
+    summary="导出合并日历文件",
+    description="""
+根据已加载的事件数据即时生成日历文件（.ics 格式），可在一个订阅中合并多个游戏和事件类型。
+
+**参数说明：**
+- `games`：游戏名称，可重复传入多个；不传表示全部游戏
+- `types`：事件类型，可重复传入多个；不传表示全部类型
+- `past_days`：保留最近多少天内结束的事件（默认30）
+- `future_days`：只保留多少天内开始的事件；不传表示不限制
+
+**示例：**
+`/hoyo_calendar/ics/merged?games=原神&games=崩坏：星穹铁道&types=活动`
+
+**注意事项：**
+- 生日事件按年重复，不受时间窗口限制
+- 生成结果按筛选条件和数据版本缓存，数据更新后自动重新生成
+- 如果游戏不存在，返回404
+- 支持 gzip/br 压缩及 ETag 缓存校验
+""",
+    operation_id="cal_export_merged_ics",
+    responses={
+        200: {"description": "成功获取日历文件", "content": {"text/calendar": {}}},
+        404: {"description": "游戏不存在"},
+        500: {"description": "服务器内部错误"},
+    },
+)
+@self_validating()
+async def get_merged_ics(
+    request: Request,
+    games: list[str] | None = Query(None, description="游戏名称，可传入多个"),
+    types: list[str] | None = Query(None, description="事件类型，可传入多个"),
+    past_days: int = Query(30, ge=0, description="保留最近多少天内结束的事件"),
+    future_days: int | None = Query(
+        None, ge=0, description="只保留多少天内开始的事件，不传表示不限制"
+    ),
+):
+    game_filter = sorted(set(games)) if games else None
+    type_filter = sorted(set(types)) if types else None
+    today = services.calendar_today()
+
+    async def build():
+        return await services.build_merged_ics(
+            game_filter, type_filter, past_days, future_days, today
+        )
+
+    try:
+        key = (
+            "merged_ics",
+            tuple(game_filter or ()),
+            tuple(type_filter or ()),
+            past_days,
+            future_days,
+            today.date(),
+        )
+        ics = await response_cache.get_or_create(key, build)
+        return await response_cache.response(
+            request,
+            key,
+            ics,
+            media_type="text/calendar",
+            headers={"Content-Disposition": 'attachment; filename="calendar.ics"'},
+        )
+    except KeyError as e:
+        logger.error(f"合并日历中的游戏不存在: {e}")
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"ICS文件 {game}/{data_type} 不存在",
+            detail=f"游戏 {', '.join(games or [])} 中存在未收录的游戏",
         )
     except Exception as e:
-        logger.error(f"获取游戏{data_type}数据异常: {e}")
+        logger.error(f"生成合并日历异常: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal Server Error",
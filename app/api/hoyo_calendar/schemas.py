@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from datetime import date
+
+from pydantic import BaseModel, Field
 
 
 class GameInfo(BaseModel):
@@ -24,3 +26,63 @@ class EventListResponse(BaseModel):
     items: list[dict]
     offset: int
     limit: int
+
+
+class ActiveEventInfo(BaseModel):
+    game: str
+    type: str
+    item: dict
+
+
+class ActiveEventListResponse(BaseModel):
+    total: int
+    items: list[ActiveEventInfo]
+
+
+class CharacterGamesInfo(BaseModel):
+    char: str
+    games: list[str]
+
+
+class CharacterGamesListResponse(BaseModel):
+    total: int
+    items: list[CharacterGamesInfo]
+
+
+class UpcomingBirthdayInfo(BaseModel):
+    game: str
+    name: str
+    date: date
+    days_until: int
+    item: dict
+
+
+class UpcomingBirthdayListResponse(BaseModel):
+    total: int
+    start: date
+    items: list[UpcomingBirthdayInfo]
+
+
+class BirthdayKey(BaseModel):
+    char: str
+    game: str | None = None
+
+
+class BirthdayBatchRequest(BaseModel):
+    items: list[BirthdayKey] = Field(..., min_length=1, max_length=100)
+
+
+class CharacterBirthdayInfo(BaseModel):
+    game: str
+    birthday: dict
+
+
+class BirthdayBatchResult(BaseModel):
+    char: str
+    game: str | None
+    items: list[CharacterBirthdayInfo]
+
+
+class BirthdayBatchResponse(BaseModel):
+    total: int
+    items: list[BirthdayBatchResult]
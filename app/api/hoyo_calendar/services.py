@@ -1,24 +1,35 @@
-from pathlib import Path
+import calendar
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain
+
+from app.core.artifact import Artifact
+from app.core.heavy_executor import heavy_executor
 
 from .data import data
+from .events import BIRTHDAY_TYPE, DATA_TIMEZONE, event_range
+from .ics import render_calendar
 from . import schemas
 
 
 async def list_games() -> list[schemas.GameInfo]:
-    json_data = getattr(data, "json", {})
+    json_data = data.snapshot.json
     return [schemas.GameInfo(name=game_name) for game_name in json_data.keys()]
 
 
 async def list_event_types(game: str) -> list[schemas.EventTypeInfo]:
-    json_data = getattr(data, "json", {})
+    json_data = data.snapshot.json
     if game not in json_data:
         raise KeyError(f"Game {game} not found")
     game_data = json_data.get(game, {})
     return [schemas.EventTypeInfo(name=type_name) for type_name in game_data.keys()]
 
 
-async def get_event_data(game: str, data_type: str) -> list[dict]:
-    json_data = getattr(data, "json", {})
+# 每页数量达到该值时在线程池中构建分页结果
+LARGE_PAGE_SIZE = 50
+
+
+def _get_event_data(game: str, data_type: str) -> list[dict]:
+    json_data = data.snapshot.json
     if game not in json_data:
         raise KeyError(f"Game {game} not found")
     game_data = json_data.get(game, {})
@@ -26,49 +37,286 @@ async def get_event_data(game: str, data_type: str) -> list[dict]:
         raise KeyError(f"Event type {data_type} not found for game {game}")
     return game_data.get(data_type, [])
 
-async def get_games_by_character_name(char:str)->list:
-    json_data = getattr(data, "json", {})
-    result = []
 
-    for game, game_data in json_data.items():
-        # game_data: {"生日": [...]}
+def _timestamp(value: datetime | None) -> float | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=DATA_TIMEZONE)
+    return value.timestamp()
 
-        birthday_data = game_data.get("生日")
-        if not birthday_data:
-            continue
 
-        for item in birthday_data:
-            if item.get("name", "") == char:
-                result.append(game)
-                break  # 当前游戏命中就不用继续查了
+def _query_window(
+    start: datetime | None, end: datetime | None, active_at: datetime | None
+) -> tuple[float | None, float | None]:
+    """
+    将 start/end/active_at 合并为一个查询时间段：
+    与 [start, end] 有交集且包含 active_at 的事件，
+    等价于与 [max(start, active_at), min(end, active_at)] 有交集的事件
+    """
+    lower, upper = _timestamp(start), _timestamp(end)
+    at = _timestamp(active_at)
+    if at is not None:
+        lower = at if lower is None else max(lower, at)
+        upper = at if upper is None else min(upper, at)
+    return lower, upper
 
-    if not result:
-        raise KeyError(f"Character {char} not found in any game")
 
+def _filter_event_data(
+    game: str,
+    data_type: str,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    active_at: datetime | None = None,
+) -> list[dict]:
+    """
+    按时间筛选事件：返回与 [start, end] 有交集、且在 active_at 时刻进行中的事件，
+    保持原顺序。无法解析时间的事件（如生日）不会出现在结果中
+    """
+    snapshot = data.snapshot
+    if game not in snapshot.json:
+        raise KeyError(f"Game {game} not found")
+    if data_type not in snapshot.json[game]:
+        raise KeyError(f"Event type {data_type} not found for game {game}")
+    data_list = snapshot.json[game][data_type]
+    time_index = snapshot.time_index[game][data_type]
+    lower, upper = _query_window(start, end, active_at)
+    return [data_list[i] for i in time_index.overlapping(lower, upper)]
+
+
+async def get_event_page(
+    game: str,
+    data_type: str,
+    offset: int,
+    limit: int,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    active_at: datetime | None = None,
+) -> schemas.EventListResponse:
+    """按时间筛选（可选）后分页；每页数量较大时在线程池中执行"""
+    args = (game, data_type, offset, limit, start, end, active_at)
+    if limit >= LARGE_PAGE_SIZE:
+        return await heavy_executor.run(_event_page, *args)
+    return _event_page(*args)
+
+
+def _event_page(
+    game: str,
+    data_type: str,
+    offset: int,
+    limit: int,
+    start: datetime | None,
+    end: datetime | None,
+    active_at: datetime | None,
+) -> schemas.EventListResponse:
+    if start is None and end is None and active_at is None:
+        data_list = _get_event_data(game, data_type)
+    else:
+        data_list = _filter_event_data(game, data_type, start, end, active_at)
+
+    # 分页处理
+    total = len(data_list)
+    if limit > 0:
+        items = data_list[offset : offset + limit]
+    else:
+        items = data_list[offset:]
+
+    return schemas.EventListResponse(
+        total=total, items=items, offset=offset, limit=limit
+    )
+
+
+async def list_active_events(
+    at: datetime | None = None,
+    games: list[str] | None = None,
+    data_types: list[str] | None = None,
+) -> list[schemas.ActiveEventInfo]:
+    """所有（或指定）游戏中在 at 时刻（默认当前时间）进行中的事件"""
+    snapshot = data.snapshot
+    for game in games or ():
+        if game not in snapshot.json:
+            raise KeyError(f"Game {game} not found")
+    timestamp = _timestamp(at or datetime.now(timezone.utc))
+
+    result = []
+    for game in games or snapshot.json.keys():
+        game_index = snapshot.time_index.get(game, {})
+        for data_type, items in snapshot.json[game].items():
+            if data_types and data_type not in data_types:
+                continue
+            time_index = game_index.get(data_type)
+            if time_index is None:
+                continue
+            for i in time_index.overlapping(timestamp, timestamp):
+                result.append(
+                    schemas.ActiveEventInfo(game=game, type=data_type, item=items[i])
+                )
     return result
 
+
+async def get_games_by_character_name(char: str) -> list[str]:
+    games = data.snapshot.characters.get(char)
+    if not games:
+        raise KeyError(f"Character {char} not found in any game")
+    return list(games)
+
+
+async def get_games_by_character_names(chars: list[str]) -> dict[str, list[str]]:
+    """批量查询角色所属游戏，未收录的角色对应空列表"""
+    characters = data.snapshot.characters
+    return {char: list(characters.get(char, ())) for char in chars}
+
+
+async def suggest_characters(q: str, limit: int) -> list[schemas.CharacterGamesInfo]:
+    snapshot = data.snapshot
+    return [
+        schemas.CharacterGamesInfo(char=char, games=list(snapshot.characters[char]))
+        for char in snapshot.character_suggest.suggest(q.strip(), limit)
+    ]
+
+
 async def get_birthday(game: str, char: str) -> dict:
-    json_data = getattr(data, "json", {})
-    if game not in json_data:
+    snapshot = data.snapshot
+    if game not in snapshot.json:
         raise KeyError(f"Game {game} not found")
-    game_data = json_data.get(game, {})
-    if "生日" not in game_data:
-        raise KeyError(f"Event type 生日 not found for game {game}")
-    birthday_data = game_data.get("生日", [])
-    for item in birthday_data:
-        if item.get("name", "") == char:
-            return item
-    raise KeyError(f"Character {char} not found in birthday data for game {game}")
+    if BIRTHDAY_TYPE not in snapshot.json[game]:
+        raise KeyError(f"Event type {BIRTHDAY_TYPE} not found for game {game}")
+    item = snapshot.characters.get(char, {}).get(game)
+    if item is None:
+        raise KeyError(f"Character {char} not found in birthday data for game {game}")
+    return item
+
+
+async def get_birthdays(
+    keys: list[schemas.BirthdayKey],
+) -> list[schemas.BirthdayBatchResult]:
+    """
+    批量查询角色生日，结果与 keys 顺序一致；
+    未指定游戏时返回该角色在所有游戏中的生日，查不到时为空列表
+    """
+    characters = data.snapshot.characters
+    results = []
+    for key in keys:
+        games = characters.get(key.char, {})
+        if key.game is not None:
+            games = {key.game: games[key.game]} if key.game in games else {}
+        results.append(
+            schemas.BirthdayBatchResult(
+                char=key.char,
+                game=key.game,
+                items=[
+                    schemas.CharacterBirthdayInfo(game=game, birthday=item)
+                    for game, item in games.items()
+                ],
+            )
+        )
+    return results
+
+
+def _next_birthday(month: int, day: int, start: date) -> date:
+    """start 当天或之后最近的一次生日；非闰年的 2 月 29 日按 3 月 1 日计算"""
+    for year in (start.year, start.year + 1):
+        if (month, day) == (2, 29) and not calendar.isleap(year):
+            birthday = date(year, 3, 1)
+        else:
+            birthday = date(year, month, day)
+        if birthday >= start:
+            return birthday
+    return birthday
+
+
+async def list_upcoming_birthdays(
+    start: date, limit: int, game: str | None = None
+) -> list[schemas.UpcomingBirthdayInfo]:
+    """从 start 当天起最近的 limit 个生日，跨年后从年初继续"""
+    snapshot = data.snapshot
+    if game is not None and game not in snapshot.json:
+        raise KeyError(f"Game {game} not found")
+    index = snapshot.birthdays.get(game)
+    if index is None:
+        return []
 
+    # 非闰年的 2 月 29 日生日顺延到 3 月 1 日，实际顺序可能与索引顺序不同
+    # （如从 3 月 1 日起查询时它们在索引中排在最后）：
+    # 多取出这些生日，按实际日期重新排序后再截取
+    leap_day = index.on(2, 29)
+    positions = dict.fromkeys(
+        chain(index.upcoming(start.month, start.day, limit + len(leap_day)), leap_day)
+    )
+    upcoming = sorted(
+        (_next_birthday(*index.keys[i], start), order, i)
+        for order, i in enumerate(positions)
+    )[:limit]
 
-async def get_ics_path(game: str, data_type: str) -> str:
-    ics_data = getattr(data, "ics", {})
+    result = []
+    for birthday, _, i in upcoming:
+        item_game, item = index.entries[i]
+        result.append(
+            schemas.UpcomingBirthdayInfo(
+                game=item_game,
+                name=str(item.get("name", "")),
+                date=birthday,
+                days_until=(birthday - start).days,
+                item=item,
+            )
+        )
+    return result
+
+
+async def get_ics(game: str, data_type: str) -> Artifact:
+    ics_data = data.snapshot.ics
     if game not in ics_data:
         raise KeyError(f"Game {game} not found")
     game_data = ics_data.get(game, {})
     if data_type not in game_data:
         raise KeyError(f"Event type {data_type} not found for game {game}")
-    ics_path = game_data.get(data_type, None)
-    if not Path(ics_path).exists():
-        raise FileNotFoundError(f"ICS file {ics_path} not found")
-    return str(ics_path) if ics_path else ""
+    return game_data[data_type]
+
+
+def calendar_today() -> datetime:
+    """数据时区中当天的零点，合并日历的时间窗口以此为基准"""
+    now = datetime.now(DATA_TIMEZONE)
+    return now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def build_merged_ics(
+    games: list[str] | None,
+    data_types: list[str] | None,
+    past_days: int,
+    future_days: int | None,
+    today: datetime,
+) -> bytes:
+    """
+    由已加载的 JSON 事件数据生成合并的 ICS 文件。
+    - games / data_types 为空时表示全部
+    - 只保留与 [today - past_days, today + future_days] 有交集的事件，
+      future_days 为空时不限制结束时间；生日按年重复，始终保留
+    """
+    json_data = data.snapshot.json
+    for game in games or ():
+        if game not in json_data:
+            raise KeyError(f"Game {game} not found")
+
+    window_start = today - timedelta(days=past_days)
+    window_end = None if future_days is None else today + timedelta(days=future_days)
+
+    events = []
+    for game in games or json_data.keys():
+        for data_type, items in json_data[game].items():
+            if data_types and data_type not in data_types:
+                continue
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                if data_type != BIRTHDAY_TYPE:
+                    start, end = event_range(item)
+                    if start is None or end < window_start:
+                        continue
+                    if window_end is not None and start > window_end:
+                        continue
+                events.append((game, data_type, item))
+
+    name = "、".join(games) if games else "米哈游游戏"
+    if data_types:
+        name += "（" + "、".join(data_types) + "）"
+    return render_calendar(f"{name}日历", events, datetime.now(timezone.utc))
@@ -1,29 +1,53 @@
-import json
 from pathlib import Path
+from typing import NamedTuple
 
+from app.core.artifact import Artifact
 from app.core.base_data import BaseData
 
+from .index import GameVideoIndex, load_video_data
+
+
+class VideoSnapshot(NamedTuple):
+    """
+    某一时刻的完整视频数据（含索引），构建完成后不再修改。
+    数据重新加载时生成新的快照并整体替换，请求处理时只需读取一次 data.snapshot。
+    """
+
+    update_time: str | None
+    games: dict[str, GameVideoIndex]
+    rss: dict[str, Artifact]
+
 
 class HoyoVideoData(BaseData):
+    snapshot = VideoSnapshot(update_time=None, games={}, rss={})
+
     def load_file(self, file_path: Path) -> None:
         if file_path.name == "data.json":
-            f = file_path.open("r", encoding="utf-8")
-            setattr(self, "all_data", json.load(f))
-            f.close()
+            # 解析与索引构建在工作进程中完成，这里只接收结果并替换快照
+            update_time, video_index, errors = self.run_loader(
+                load_video_data, file_path
+            )
+            for error in errors:
+                self.logger.warning(f"视频数据格式错误，已跳过: {error}")
+            self.snapshot = self.snapshot._replace(
+                update_time=update_time, games=video_index
+            )
         elif file_path.suffix == ".xml":
-            if not hasattr(self, "rss"):
-                setattr(self, "rss", {})
-            rss_data = getattr(self, "rss")
-            abs_path = str(file_path.resolve())
-            rss_data[file_path.stem] = abs_path
+            # RSS 内容常驻内存，并预先生成压缩版本
+            artifact = Artifact.from_file(file_path)
+            rss_data = {**self.snapshot.rss, file_path.stem: artifact}
+            self.snapshot = self.snapshot._replace(rss=rss_data)
 
     def on_file_deleted(self, file_path: Path) -> None:
         if file_path.name == "data.json":
-            setattr(self, "all_data", {})
+            self.snapshot = self.snapshot._replace(update_time=None, games={})
         elif file_path.suffix == ".xml":
-            if hasattr(self, "rss"):
-                rss_data = getattr(self, "rss")
-                del rss_data[file_path.stem]
+            rss_data = {
+                game: artifact
+                for game, artifact in self.snapshot.rss.items()
+                if game != file_path.stem
+            }
+            self.snapshot = self.snapshot._replace(rss=rss_data)
 
 
 data = HoyoVideoData("hoyo_video")
@@ -0,0 +1,286 @@
+# 视频数据解析与索引构建
+# 本模块不依赖已加载的数据，可在独立的工作进程中执行
+import json
+import sys
+from array import array
+from datetime import datetime, timezone
+from operator import attrgetter
+from pathlib import Path
+
+from pydantic import TypeAdapter
+
+from app.utils.columnar import pack_strings, unpack_strings
+from app.utils.prefix_index import PrefixIndex
+
+from .search import TitleSearchIndex, suggest_starts
+
+ALL_VIDEOS_TYPE = "全部视频"
+OTHER_VIDEOS_TYPE = "其他"
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# VideoTable 中的文本列，跨进程传递时打包为字节串
+_TEXT_COLUMNS = ("titles", "srcs", "covers", "intros")
+# 视频 ID 按 VideoInfo.id 的规则（pydantic 宽松模式）转换，"123"、123.0 等同样接受
+_VIDEO_ID = TypeAdapter(int)
+# VideoTable.ids 为有符号 64 位整数数组
+_VIDEO_ID_RANGE = range(-(2**63), 2**63)
+
+
+def _checked(value: object, expected: type) -> object:
+    if not isinstance(value, expected):
+        raise TypeError(f"应为 {expected.__name__}，实际为 {type(value).__name__}")
+    return value
+
+
+def _video_id(value: object) -> int:
+    video_id = _VIDEO_ID.validate_python(value)
+    if video_id not in _VIDEO_ID_RANGE:
+        raise ValueError(f"视频 ID 超出范围: {video_id}")
+    return video_id
+
+
+def parse_video_time(time_str: str) -> int:
+    """将视频发布时间解析为整数时间戳，仅用于排序与比较"""
+    dt = datetime.strptime(time_str, TIME_FORMAT)
+    return int(dt.replace(tzinfo=timezone.utc).timestamp())
+
+
+class VideoRecord:
+    """
+    紧凑的视频记录：使用 __slots__ 代替字典，类型与游戏名做字符串驻留，
+    发布时间以整数时间戳保存。字段与 schemas.VideoInfo 一致。
+    """
+
+    __slots__ = ("id", "title", "timestamp", "type", "src", "cover", "intro", "game")
+
+    def __init__(self, video: dict) -> None:
+        self.id: int = _video_id(video["id"])
+        self.title: str = _checked(video["title"], str)
+        self.timestamp: int = parse_video_time(video["time"])
+        self.type: tuple[str, ...] = tuple(sys.intern(t) for t in video["type"])
+        self.src: str = _checked(video["src"], str)
+        self.cover: str = _checked(video["cover"], str)
+        self.intro: str = _checked(video["intro"], str)
+        self.game: str = sys.intern(video["game"])
+
+    @property
+    def time(self) -> datetime:
+        return datetime.fromtimestamp(self.timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def build_video_records(raw_videos: list[dict], errors: list[str]) -> list[VideoRecord]:
+    """构建视频记录，格式错误的视频被跳过，原因追加到 errors"""
+    records = []
+    for video in raw_videos:
+        try:
+            records.append(VideoRecord(video))
+        except (KeyError, TypeError, ValueError) as e:
+            errors.append(f"{video.get('title', 'Unknown')} - {e!r}")
+    return records
+
+
+class VideoTable:
+    """
+    按列保存的视频记录：整数字段为数组，文本字段为字符串列表，
+    类型与游戏名保存为名称表中的编号。
+    按下标访问时才构造 VideoRecord，常驻内存的只有少数几个大对象，
+    不会因数万个小对象拖慢垃圾回收，跨进程传递时也无需逐个序列化。
+    """
+
+    __slots__ = (
+        "ids",
+        "timestamps",
+        "titles",
+        "srcs",
+        "covers",
+        "intros",
+        "type_names",
+        "type_ends",
+        "type_ids",
+        "game_names",
+        "game_ids",
+    )
+
+    def __init__(self, records: list[VideoRecord]) -> None:
+        self.ids = array("q", (video.id for video in records))
+        self.timestamps = array("q", (video.timestamp for video in records))
+        self.titles = [video.title for video in records]
+        self.srcs = [video.src for video in records]
+        self.covers = [video.cover for video in records]
+        self.intros = [video.intro for video in records]
+
+        # 第 i 条视频的类型为 type_ids[type_ends[i - 1]:type_ends[i]]
+        type_names: dict[str, int] = {}
+        self.type_ends = array("Q")
+        self.type_ids = array("I")
+        game_names: dict[str, int] = {}
+        self.game_ids = array("I")
+        for video in records:
+            self.type_ids.extend(
+                type_names.setdefault(t, len(type_names)) for t in video.type
+            )
+            self.type_ends.append(len(self.type_ids))
+            self.game_ids.append(game_names.setdefault(video.game, len(game_names)))
+        self.type_names = list(type_names)
+        self.game_names = list(game_names)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, position: int) -> VideoRecord:
+        if position < 0:
+            position += len(self.ids)
+        start = self.type_ends[position - 1] if position > 0 else 0
+        record = VideoRecord.__new__(VideoRecord)
+        record.id = self.ids[position]
+        record.title = self.titles[position]
+        record.timestamp = self.timestamps[position]
+        record.type = tuple(
+            self.type_names[i] for i in self.type_ids[start : self.type_ends[position]]
+        )
+        record.src = self.srcs[position]
+        record.cover = self.covers[position]
+        record.intro = self.intros[position]
+        record.game = self.game_names[self.game_ids[position]]
+        return record
+
+    def __getstate__(self) -> dict:
+        """
+        文本字段拼接为 UTF-8 字节串：反序列化时只需复制少量大块内存，
+        字符串在 __setstate__ 中逐个还原，期间其他线程（如事件循环）可以正常调度；
+        直接 pickle 字符串列表时，所有字符串都在一次 pickle.loads 调用中创建并一直持有 GIL
+        """
+        state = {name: getattr(self, name) for name in self.__slots__}
+        for name in _TEXT_COLUMNS:
+            state[name] = pack_strings(state[name])
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        for name in self.__slots__:
+            value = state[name]
+            if name in _TEXT_COLUMNS:
+                value = list(unpack_strings(value))
+            setattr(self, name, value)
+        self.type_names = [sys.intern(name) for name in self.type_names]
+        self.game_names = [sys.intern(name) for name in self.game_names]
+
+
+class GameVideoIndex:
+    """
+    单个游戏的视频索引，在 data.json 加载时一次性构建：
+    - videos: 按发布时间倒序排列的视频记录（按列保存，见 VideoTable）
+    - by_id: 视频ID -> 该视频在 videos 中的下标
+    - type_positions: 视频类型 -> 该类型视频在 videos 中的下标数组，按时间倒序
+      （含 '全部视频' 与 '其他'）。保存下标而非视频ID，ID 重复时也能取到对应的记录
+    - type_list: 视频类型列表（含封面），供类型列表接口直接返回
+    - search_index: 标题倒排索引，位置对应 videos 中的下标
+    - suggest_titles / suggest_times: 去重后的标题及其最新发布时间，按时间倒序
+    - suggest_index: 标题补全索引，值ID对应 suggest_titles 中的下标
+
+    索引只由数组、字符串列表和字典组成，加载进程构建后传回服务进程、
+    以及发布快照时，反序列化不会长时间阻塞事件循环（见 VideoTable.__getstate__）。
+    """
+
+    def __init__(self, game_data: dict, errors: list[str]) -> None:
+        self.weight: int = game_data.get("weight", 0)
+        self.news_detail_url: str = game_data.get("news_detail_url", "")
+
+        records = build_video_records(game_data.get("videos", []), errors)
+        # sorted 是稳定排序，同一时间的视频保持原始顺序
+        videos = sorted(records, key=attrgetter("timestamp"), reverse=True)
+        self.videos = VideoTable(videos)
+
+        position_of = {id(video): i for i, video in enumerate(videos)}
+        self.by_id: dict[int, int] = {}
+        for video in records:
+            # 与逐条查找一致：ID 重复时取原始列表中的第一条
+            self.by_id.setdefault(video.id, position_of[id(video)])
+
+        self.type_positions: dict[str, array] = {
+            type_name: array("I") for type_name in game_data.get("video_types", [])
+        }
+        self.type_positions.setdefault(OTHER_VIDEOS_TYPE, array("I"))
+        for position, video in enumerate(videos):
+            for type_name in set(video.type):
+                self.type_positions.setdefault(type_name, array("I")).append(position)
+        self.type_positions[ALL_VIDEOS_TYPE] = array("I", range(len(videos)))
+
+        self.type_list = self._build_type_list(game_data, records, videos)
+
+        self.search_index = TitleSearchIndex(self.videos.titles)
+
+        self._build_suggest_titles()
+        self.suggest_index = PrefixIndex(
+            ((title.lower(), i) for i, title in enumerate(self.suggest_titles)),
+            self.suggest_times,
+            suggest_starts,
+        )
+
+    def get_video(self, video_id: int) -> VideoRecord | None:
+        position = self.by_id.get(video_id)
+        return None if position is None else self.videos[position]
+
+    def _build_suggest_titles(self) -> None:
+        # videos 已按时间倒序排列，标题第一次出现即最新发布时间
+        latest: dict[str, int] = {}
+        for title, timestamp in zip(self.videos.titles, self.videos.timestamps):
+            latest.setdefault(title, timestamp)
+        self.suggest_titles: list[str] = list(latest)
+        self.suggest_times: list[int] = list(latest.values())
+
+    def __getstate__(self) -> dict:
+        # 补全标题可由视频记录推导，不随索引传递，反序列化后重新与标题列共用字符串
+        state = self.__dict__.copy()
+        del state["suggest_titles"], state["suggest_times"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.search_index.share_titles(self.videos.titles)
+        self._build_suggest_titles()
+
+    def _build_type_list(
+        self,
+        game_data: dict,
+        records: list[VideoRecord],
+        videos: list[VideoRecord],
+    ) -> list[dict]:
+        """视频类型列表及各类型最新一条视频的封面，不修改原始数据"""
+        if not records:
+            return []
+        type_names = list(game_data.get("video_types", []))
+        if OTHER_VIDEOS_TYPE not in type_names:
+            type_names.append(OTHER_VIDEOS_TYPE)
+
+        # videos 已按时间倒序排列，每个类型第一次出现的视频即最新视频
+        covers: dict[str, str] = {}
+        for video in videos:
+            for type_name in video.type:
+                covers.setdefault(type_name, video.cover)
+
+        type_list = [{"type_name": ALL_VIDEOS_TYPE, "cover": records[-1].cover}]
+        for type_name in type_names:
+            if type_name in covers:
+                type_list.append({"type_name": type_name, "cover": covers[type_name]})
+        return type_list
+
+
+def build_video_index(all_data: dict, errors: list[str]) -> dict[str, GameVideoIndex]:
+    return {
+        game_name: GameVideoIndex(game_data, errors)
+        for game_name, game_data in all_data.get("data", {}).items()
+    }
+
+
+def load_video_data(
+    file_path: Path,
+) -> tuple[str | None, dict[str, GameVideoIndex], list[str]]:
+    """
+    解析 data.json 并构建索引，返回 (更新时间, 各游戏索引, 被跳过视频的错误信息)。
+    原始 JSON 在构建完成后即被释放，只保留紧凑的索引。
+    """
+    f = file_path.open("r", encoding="utf-8")
+    all_data = json.load(f)
+    f.close()
+    errors: list[str] = []
+    video_index = build_video_index(all_data, errors)
+    return all_data.get("update_time"), video_index, errors
@@ -1,12 +1,19 @@
 # 路由逻辑
-from fastapi import APIRouter, HTTPException, Path, Query
-from fastapi.responses import FileResponse, Response
+from contextlib import nullcontext
+
+from fastapi import APIRouter, HTTPException, Path, Query, Request
 from loguru import logger
 
-from . import services, schemas
+from app.core.rate_limit import expensive_call
+from app.core.response_cache import ResponseCache
+from app.middleware.http_cache import self_validating
+from app.utils.prefix_index import MAX_SUGGESTIONS
 
+from . import services, schemas
+from .data import data
 
 router = APIRouter(tags=["影像档案架"])
+response_cache = ResponseCache(data)
 
 
 @router.get(
@@ -31,10 +38,13 @@ async def get_update_time():
     description="查询游戏中文名称和新闻详情页模板；使用时需将模板中的 '%id' 占位符替换为后续获取的视频ID，以合成完整的官方公告链接。",
     operation_id="list_games",
 )
-async def list_games():
-    try:
+async def list_games(request: Request):
+    async def build():
         game_list = await services.list_games()
-        return {"total": len(game_list), "items": game_list}
+        return schemas.GameListResponse(total=len(game_list), items=game_list)
+
+    try:
+        return await response_cache.get_or_build(request, ("list_games",), build)
     except Exception as e:
         logger.error(f"获取游戏列表异常: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -47,10 +57,17 @@ async def list_games():
     description="查询特定游戏的所有视频栏目分类；注意返回列表除常规分类外，还包含 '全部视频' 与 '其他' 选项。",
     operation_id="list_video_types",
 )
-async def list_video_types(game: str = Path(..., description="游戏名称")):
-    try:
+async def list_video_types(
+    request: Request, game: str = Path(..., description="游戏名称")
+):
+    async def build():
         type_list = await services.list_video_types(game)
-        return {"total": len(type_list), "items": type_list}
+        return schemas.TypeListResponse(total=len(type_list), items=type_list)
+
+    try:
+        return await response_cache.get_or_build(
+            request, ("list_video_types", game), build
+        )
     except Exception as e:
         logger.error(f"获取类型列表异常: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -64,6 +81,7 @@ async def list_video_types(game: str = Path(..., description="游戏名称")):
     operation_id="list_videos",
 )
 async def list_videos(
+    request: Request,
     game: str = Path(..., description="游戏名称", examples=["原神", "崩坏：星穹铁道"]),
     type: str = Query(
         ..., description="视频类型", examples=["全部视频", "角色PV", "其他"]
@@ -72,14 +90,28 @@ async def list_videos(
     page_size: int = Query(20, ge=1, le=100, description="每页数量"),
     all_data: bool = Query(False, alias="all", description="是否获取全部"),
 ):
-    try:
+    async def build():
         total, videos = await services.list_videos(
             game, type, page, page_size, all_data
         )
-        return {
-            "total": total,
-            "items": videos,
-        }
+        return schemas.VideoListResponse(total=total, items=videos)
+
+    try:
+        # 全量列表按耗时请求限流（仅在未命中缓存时）
+        return await response_cache.get_or_build(
+            request,
+            # 全量列表与分页参数无关，共用一个缓存条目
+            (
+                ("list_videos", game, type, True)
+                if all_data
+                else ("list_videos", game, type, page, page_size)
+            ),
+            build,
+            offload=all_data,
+            expensive=all_data,
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"获取视频列表异常: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
@@ -105,28 +137,71 @@ async def get_video_detail(
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.post(
+    "/videos/batch",
+    response_model=schemas.VideoBatchResponse,
+    summary="批量获取视频详细信息",
+    description="一次查询多个视频的详细信息（最多100个），请求体为 (游戏名称, 视频ID) 列表；结果与请求顺序一一对应，不存在的视频返回 null。",
+    operation_id="get_video_details",
+)
+async def get_video_details(body: schemas.VideoBatchRequest):
+    try:
+        videos = await services.get_video_details(body.items)
+        return {"total": len(videos), "items": videos}
+    except Exception as e:
+        logger.error(f"批量获取视频详情失败: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
 @router.get(
     "/search",
     response_model=schemas.VideoListResponse,
     summary="搜索视频",
-    description="根据关键词（支持空格分隔）搜索视频；game 参数可选，传入游戏中文名可精确筛选，不传或传入 '全部游戏' 则默认搜索所有游戏。",
+    description="根据关键词（支持空格分隔）搜索视频；game 参数可选，传入游戏中文名可精确筛选，不传或传入 '全部游戏' 则默认搜索所有游戏；结果分页返回(page/page_size)，total 为命中总数。",
     operation_id="search_videos",
 )
 async def search_videos(
+    request: Request,
     q: str = Query(..., min_length=1, description="搜索关键词"),
     game: str = Query("全部游戏", description="指定游戏范围"),
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(20, ge=1, le=100, description="每页数量"),
 ):
     try:
-        results = await services.search_videos(q, game)
+        # 跨游戏搜索按耗时请求限流
+        async with expensive_call(request) if game == "全部游戏" else nullcontext():
+            total, results = await services.search_videos(q, game, page, page_size)
         return {
-            "total": len(results),
+            "total": total,
             "items": results,
         }
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"搜索视频失败: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
 
 
+@router.get(
+    "/suggest",
+    response_model=schemas.SuggestionListResponse,
+    summary="视频标题输入补全",
+    description="根据输入的前缀返回补全的视频标题，供边输入边搜索使用；前缀可匹配标题中任意汉字或单词的开头，不区分大小写；game 参数与搜索接口相同；结果按发布时间倒序，最多返回 limit 条。",
+    operation_id="suggest_video_titles",
+)
+async def suggest_titles(
+    q: str = Query(..., min_length=1, description="输入的前缀"),
+    game: str = Query("全部游戏", description="指定游戏范围"),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS, description="返回数量"),
+):
+    try:
+        titles = await services.suggest_titles(q, game, limit)
+        return {"total": len(titles), "items": titles}
+    except Exception as e:
+        logger.error(f"获取标题补全失败: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+
 @router.get(
     "/{game}/rss",
     responses={
@@ -138,10 +213,17 @@ async def search_videos(
     summary="RSS 订阅文件获取",
     operation_id="get_rss",
 )
-async def get_rss(game: str):
+@self_validating()
+async def get_rss(request: Request, game: str):
     try:
-        rss_path = await services.get_rss_path(game)
-        return FileResponse(rss_path, media_type="application/rss+xml")
+        # 先读取修改时间再取数据，数据更新期间不会把新时间标记到旧内容上
+        last_modified = data.last_modified
+        rss = await services.get_rss(game)
+        return await rss.response(
+            request, media_type="application/rss+xml", last_modified=last_modified
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"RSS {game} not found")
     except HTTPException:
         raise
     except Exception as e:
@@ -81,3 +81,26 @@ class VideoInfo(BaseModel):
 class VideoListResponse(BaseModel):
     total: int = Field(..., description="当前页/总视频数")
     items: list[VideoInfo]
+
+
+class SuggestionListResponse(BaseModel):
+    total: int = Field(..., description="返回的补全条数")
+    items: list[str] = Field(..., description="补全的视频标题，按发布时间倒序")
+
+
+class VideoKey(BaseModel):
+    game: str = Field(..., description="游戏名称", examples=["原神"])
+    video_id: int = Field(..., description="视频ID", examples=[123456])
+
+
+class VideoBatchRequest(BaseModel):
+    items: list[VideoKey] = Field(
+        ..., min_length=1, max_length=100, description="要查询的视频，最多100个"
+    )
+
+
+class VideoBatchResponse(BaseModel):
+    total: int = Field(..., description="查询的视频数")
+    items: list[VideoInfo | None] = Field(
+        ..., description="与请求顺序一一对应的视频信息，不存在的视频为 null"
+    )
@@ -0,0 +1,166 @@
+# 视频标题搜索索引
+import re
+from array import array
+from bisect import bisect_left
+
+from app.utils.columnar import pack_strings, unpack_strings
+
+# 中日韩文字按单字和相邻双字切分，其余按连续的字母数字切分为单词
+_CJK_RE = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]+"
+)
+_WORD_RE = re.compile(r"[0-9a-z]+")
+# 单词按不超过该长度的所有子串建立索引；更长的关键词单词取其各个该长度的子串
+_WORD_GRAM_SIZE = 3
+# 倒排表长度超过候选集的该倍数时，对候选逐个二分查找，而不是遍历整个倒排表
+_PROBE_RATIO = 16
+
+
+def _contains(posting: array, position: int) -> bool:
+    i = bisect_left(posting, position)
+    return i < len(posting) and posting[i] == position
+
+
+def word_grams(word: str) -> set[str]:
+    """单词中长度为 1 到 _WORD_GRAM_SIZE 的所有子串，用于建立索引"""
+    return {
+        word[i : i + n]
+        for n in range(1, _WORD_GRAM_SIZE + 1)
+        for i in range(len(word) - n + 1)
+    }
+
+
+def query_word_grams(word: str) -> set[str]:
+    """
+    关键词中的单词可能只是标题中某个单词的一部分：
+    短单词本身即索引中的子串，长单词取其所有长度为 _WORD_GRAM_SIZE 的子串
+    """
+    if len(word) <= _WORD_GRAM_SIZE:
+        return {word}
+    return {
+        word[i : i + _WORD_GRAM_SIZE] for i in range(len(word) - _WORD_GRAM_SIZE + 1)
+    }
+
+
+def tokenize(text: str) -> tuple[set[str], set[str]]:
+    """
+    将（已转为小写的）文本切分为 (中日韩单字/双字集合, 单词集合)
+    """
+    grams: set[str] = set()
+    for run in _CJK_RE.findall(text):
+        grams.update(run)
+        grams.update(run[i : i + 2] for i in range(len(run) - 1))
+    words = set(_WORD_RE.findall(text))
+    return grams, words
+
+
+class TitleSearchIndex:
+    """
+    标题倒排索引。
+
+    关键词按与标题相同的规则切分后，对各倒排表求交集得到候选集，
+    再对候选逐一做子串校验，因此结果与 `关键词 in 标题` 的语义完全一致。
+    中日韩文字按单字/双字索引，单词按长度不超过 _WORD_GRAM_SIZE 的子串索引，
+    查询时只需查找固定数量的倒排表，与词表大小无关。
+    """
+
+    def __init__(self, titles: list[str]) -> None:
+        self.titles: list[str] = []
+        self.share_titles(titles)
+        # 中日韩字词与单词子串的字符集不相交，共用一个倒排表
+        gram_postings: dict[str, set[int]] = {}
+        for position, title in enumerate(self.titles):
+            grams, words = tokenize(title)
+            for word in words:
+                grams |= word_grams(word)
+            for gram in grams:
+                gram_postings.setdefault(gram, set()).add(position)
+
+        # 倒排表以升序的整数数组保存：比集合省内存，且不被垃圾回收跟踪
+        self.gram_postings: dict[str, array] = {
+            gram: array("I", sorted(posting)) for gram, posting in gram_postings.items()
+        }
+
+    def share_titles(self, titles: list[str]) -> None:
+        """
+        按原标题设置 titles：小写后与原标题相同（如纯中文标题）时复用原字符串，
+        避免重复占用内存。反序列化后调用，使其重新与视频记录共用字符串
+        """
+        self.titles = [
+            title if (lowered := title.lower()) == title else lowered
+            for title in titles
+        ]
+
+    def __getstate__(self) -> dict:
+        """跨进程传递时将各倒排表依次拼接为一个数组，gram 与标题拼接为字节串"""
+        posting_ends = array("Q")
+        positions = array("I")
+        for posting in self.gram_postings.values():
+            positions.extend(posting)
+            posting_ends.append(len(positions))
+        return {
+            "titles": pack_strings(self.titles),
+            "grams": pack_strings(self.gram_postings),
+            "posting_ends": posting_ends,
+            "positions": positions,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.titles = list(unpack_strings(state["titles"]))
+        positions = state["positions"]
+        self.gram_postings = {}
+        start = 0
+        for gram, end in zip(unpack_strings(state["grams"]), state["posting_ends"]):
+            self.gram_postings[gram] = positions[start:end]
+            start = end
+
+    def _keyword_postings(self, keyword: str) -> list[array]:
+        grams, words = tokenize(keyword)
+        for word in words:
+            grams |= query_word_grams(word)
+        return [self.gram_postings.get(gram, array("I")) for gram in grams]
+
+    def search(self, keywords: list[str]) -> list[int]:
+        """
+        返回所有标题包含全部关键词的位置（升序）；关键词需为小写
+        """
+        keywords = [k for k in keywords if k]
+        postings: list[array] = []
+        for keyword in keywords:
+            postings.extend(self._keyword_postings(keyword))
+
+        if postings:
+            # 从最短的倒排表开始求交集
+            postings.sort(key=len)
+            candidates = set(postings[0])
+            for posting in postings[1:]:
+                if not candidates:
+                    break
+                if len(candidates) * _PROBE_RATIO < len(posting):
+                    candidates = {p for p in candidates if _contains(posting, p)}
+                else:
+                    candidates.intersection_update(posting)
+            positions = sorted(candidates)
+        else:
+            # 关键词中没有可索引的字符（如纯标点），退化为全量校验
+            positions = range(len(self.titles))
+
+        return [
+            position
+            for position in positions
+            if all(k in self.titles[position] for k in keywords)
+        ]
+
+
+def suggest_starts(text: str) -> list[int]:
+    """
+    （已转为小写的）标题中可作为补全起点的位置：
+    每个中日韩文字，以及每个连续字母数字的开头
+    """
+    starts = [
+        position
+        for match in _CJK_RE.finditer(text)
+        for position in range(match.start(), match.end())
+    ]
+    starts.extend(match.start() for match in _WORD_RE.finditer(text))
+    return starts
@@ -1,184 +1,207 @@
 # 具体的业务逻辑
-import os
-import aiofiles
-from pathlib import Path
-from datetime import datetime
+import heapq
+from itertools import chain, groupby, islice
+from operator import itemgetter
 from loguru import logger
 from pydantic import ValidationError
 
+from app.core.artifact import Artifact
+from app.core.heavy_executor import heavy_executor
+
 from . import schemas
 from .data import data
+from .index import VideoRecord, VideoTable
+
+
+def to_video_info(video: VideoRecord) -> schemas.VideoInfo:
+    return schemas.VideoInfo.model_validate(video, from_attributes=True)
 
 
 async def get_update_time() -> str:
-    return data.all_data.get("update_time", "1970-01-01 08:00:00.000000")
+    return data.snapshot.update_time or "1970-01-01 08:00:00.000000"
 
 
 async def list_games() -> list[schemas.GameInfo]:
     game_list = []
-    raw_data = data.all_data.get("data", {})
-    for game_name, game_data in raw_data.items():
+    for game_name, game_index in data.snapshot.games.items():
         game_list.append(
             schemas.GameInfo(
                 name=game_name,
-                weight=game_data.get("weight", 0),
-                news_detail_url=game_data.get("news_detail_url", ""),
+                weight=game_index.weight,
+                news_detail_url=game_index.news_detail_url,
             )
         )
     game_list.sort(key=lambda x: x.weight, reverse=False)
     return game_list
 
 
-async def list_video_types(game: str) -> list[schemas.TypeListResponse]:
-    game_data = data.all_data.get("data", {}).get(game, {})
-    video_list = game_data.get("videos", [])
-    if not game_data or not video_list:
+async def list_video_types(game: str) -> list[dict]:
+    game_index = data.snapshot.games.get(game)
+    if game_index is None:
         return []
-    type_list = game_data.get("video_types", [])
-    if "其他" not in type_list:
-        type_list.append("其他")
-
-    results = []
-
-    def sort_videos_by_time(v_list):
-        return sorted(
-            v_list,
-            key=lambda v: datetime.strptime(
-                v.get("time", "1970-01-01 00:00:00"), "%Y-%m-%d %H:%M:%S"
-            ),
-            reverse=True,
-        )
+    # 类型列表在 data.json 加载时已计算好
+    return game_index.type_list
 
-    for type_name in type_list:
-        one_type_videos = [v for v in video_list if type_name in v.get("type", [])]
-        sorted_videos = sort_videos_by_time(one_type_videos)
 
-        if sorted_videos:
-            results.append(
-                {"type_name": type_name, "cover": sorted_videos[0].get("cover", "")}
-            )
-    if video_list:
-        results.insert(
-            0,
-            {
-                "type_name": "全部视频",
-                "cover": video_list[-1].get("cover", ""),  # 原逻辑是取最后一个？
-            },
+async def list_videos(
+    game: str,
+    type: str,
+    page: int,
+    page_size: int,
+    all_data: bool,
+) -> tuple[int, list[schemas.VideoInfo]]:
+    # 全量列表需要构造整个分类的视频信息，在线程池中执行
+    if all_data:
+        return await heavy_executor.run(
+            _list_videos, game, type, page, page_size, all_data
         )
-
-    return results
+    return _list_videos(game, type, page, page_size, all_data)
 
 
-async def list_videos(
+def _list_videos(
     game: str,
     type: str,
     page: int,
     page_size: int,
     all_data: bool,
 ) -> tuple[int, list[schemas.VideoInfo]]:
-    game_data = data.all_data.get("data", {}).get(game, {})
-    video_list = game_data.get("videos", [])
-    if not game_data or not video_list:
+    game_index = data.snapshot.games.get(game)
+    if game_index is None or not game_index.videos:
         return 0, []
 
-    if type == "全部视频":
-        filtered_videos = video_list
-    else:
-        filtered_videos = [v for v in video_list if type in v.get("type", [])]
-
-    sorted_videos = sorted(
-        filtered_videos,
-        key=lambda v: datetime.strptime(
-            v.get("time", "1970-01-01 00:00:00"), "%Y-%m-%d %H:%M:%S"
-        ),
-        reverse=True,
-    )
-    total = len(sorted_videos)
+    # 索引中的下标列表已按时间倒序排列，分页只需切片
+    positions = game_index.type_positions.get(type, [])
+    total = len(positions)
 
     if all_data:
-        paged_videos = sorted_videos
+        paged_positions = positions
     else:
         start = (page - 1) * page_size
         end = start + page_size
-        paged_videos = sorted_videos[start:end]
+        paged_positions = positions[start:end]
 
     result_videos = []
-    for video in paged_videos:
-        video_info = schemas.VideoInfo(**video)
+    for position in paged_positions:
+        video_info = to_video_info(game_index.videos[position])
         result_videos.append(video_info)
 
     return total, result_videos
 
 
 async def get_video_detail(game: str, video_id: int) -> schemas.VideoInfo | None:
-    game_data = data.all_data.get("data", {}).get(game, {})
-    video_list = game_data.get("videos", [])
-    for video in video_list:
-        if video.get("id") == video_id:
-            return schemas.VideoInfo(**video)
-    return None
+    game_index = data.snapshot.games.get(game)
+    if game_index is None:
+        return None
+    video = game_index.get_video(video_id)
+    if video is None:
+        return None
+    return to_video_info(video)
+
+
+async def get_video_details(
+    keys: list[schemas.VideoKey],
+) -> list[schemas.VideoInfo | None]:
+    """批量查询视频详情，结果与 keys 顺序一致，不存在的视频为 None"""
+    video_index = data.snapshot.games
+    results: list[schemas.VideoInfo | None] = []
+    for key in keys:
+        game_index = video_index.get(key.game)
+        video = game_index.get_video(key.video_id) if game_index else None
+        results.append(to_video_info(video) if video is not None else None)
+    return results
+
 
+async def search_videos(
+    q: str,
+    game: str,
+    page: int,
+    page_size: int,
+) -> tuple[int, list[schemas.VideoInfo]]:
+    # 跨游戏搜索需要查询并归并所有游戏的结果，在线程池中执行
+    if game == "全部游戏":
+        return await heavy_executor.run(_search_videos, q, game, page, page_size)
+    return _search_videos(q, game, page, page_size)
 
-async def search_videos(q: str, game: str) -> list[schemas.VideoInfo]:
-    results: list[tuple[int, schemas.VideoInfo]] = []
 
+def _search_videos(
+    q: str,
+    game: str,
+    page: int,
+    page_size: int,
+) -> tuple[int, list[schemas.VideoInfo]]:
     query_list = q.lower().strip().split()
-    raw_data = data.all_data.get("data", {})
+    # 只读取一次快照，处理过程中数据重新加载也不受影响
+    video_index = data.snapshot.games
 
-    target_games = [game] if game != "全部游戏" else raw_data.keys()
+    # (权重, 视频表, 命中的下标)；每个游戏的命中结果已按时间倒序排列
+    matches: list[tuple[int, VideoTable, list[int]]] = []
+    target_games = [game] if game != "全部游戏" else video_index.keys()
     for game_name in target_games:
-        game_data = raw_data.get(game_name)
-        if not game_data:
+        game_index = video_index.get(game_name)
+        if game_index is None:
             continue
-        weight = game_data.get("weight", 0)
-
-        for video in game_data.get("videos", []):
-            title = video.get("title", "").lower()
-            # 关键词全匹配
-            if all(k in title for k in query_list if k):
-                try:
-                    video_obj = schemas.VideoInfo(**video)
-                    results.append((weight, video_obj))
-                except ValidationError as e:
-                    logger.warning(
-                        f"视频数据格式错误: {video.get('title', 'Unknown')} - {e}"
-                    )
-                    continue
-
-    results.sort(key=lambda x: (-x[0], x[1].time), reverse=True)
-    return [item[1] for item in results]
-
-
-RSS_FOLDER = Path("data/hoyo_video/rss")
-RSS_LAST_MTIME = {}
-RSS_CACHE = {}
-
-
-async def get_rss(game: str) -> bytes | None:
-    global RSS_CACHE, RSS_LAST_MTIME
-    rss_file = RSS_FOLDER / (game + ".xml")
-    try:
-        mtime = os.path.getmtime(rss_file)
-    except OSError:
-        logger.warning(f"RSS 文件不存在或无法访问: {rss_file}")
-        return None
-    if game in RSS_LAST_MTIME and RSS_LAST_MTIME[game] == mtime and game in RSS_CACHE:
-        logger.debug(f"RSS 文件未更改，使用缓存: {rss_file}")
-        return RSS_CACHE[game]
-    logger.info(f"加载 RSS 文件: {rss_file}")
-    try:
-        async with aiofiles.open(rss_file, "rb") as f:
-            content = await f.read()
-            RSS_CACHE[game] = content
-            RSS_LAST_MTIME[game] = mtime
-            return content
-    except Exception as e:
-        logger.error(f"加载 RSS 失败: {e}")
-        if game in RSS_CACHE:
-            return RSS_CACHE[game]
-        raise e
-
-
-async def get_rss_path(game: str) -> str:
-    rss_path = data.rss.get(game, "")
-    return str(rss_path) if rss_path else ""
+
+        # 关键词全匹配，由倒排索引筛选候选
+        positions = game_index.search_index.search(query_list)
+        if positions:
+            matches.append((game_index.weight, game_index.videos, positions))
+
+    total = sum(len(positions) for _, _, positions in matches)
+
+    # 排序规则：权重升序，同权重的游戏之间按时间倒序归并；
+    # 只取出当前页所需的视频，无需对全部结果排序，也只为这些视频构造记录
+    matches.sort(key=lambda item: item[0])
+    ordered_videos = chain.from_iterable(
+        heapq.merge(
+            *(
+                (
+                    (videos.timestamps[position], videos, position)
+                    for position in positions
+                )
+                for _, videos, positions in group
+            ),
+            key=itemgetter(0),
+            reverse=True,
+        )
+        for _, group in groupby(matches, key=lambda item: item[0])
+    )
+
+    start = (page - 1) * page_size
+    end = start + page_size
+    results = []
+    for _, videos, position in islice(ordered_videos, start, end):
+        video = videos[position]
+        try:
+            results.append(to_video_info(video))
+        except ValidationError as e:
+            logger.warning(f"视频数据格式错误: {video.title} - {e}")
+            continue
+
+    return total, results
+
+
+async def suggest_titles(q: str, game: str, limit: int) -> list[str]:
+    prefix = q.lower().lstrip()
+    video_index = data.snapshot.games
+
+    # (发布时间, 标题)；各游戏分别取前 limit 个，再合并去重
+    candidates: list[tuple[int, str]] = []
+    target_games = [game] if game != "全部游戏" else video_index.keys()
+    for game_name in target_games:
+        game_index = video_index.get(game_name)
+        if game_index is None:
+            continue
+        for i in game_index.suggest_index.suggest(prefix, limit):
+            candidates.append(
+                (game_index.suggest_times[i], game_index.suggest_titles[i])
+            )
+
+    candidates.sort(key=lambda item: item[0], reverse=True)
+    return list(dict.fromkeys(title for _, title in candidates))[:limit]
+
+
+async def get_rss(game: str) -> Artifact:
+    rss_data = data.snapshot.rss
+    if game not in rss_data:
+        raise KeyError(f"RSS of game {game} not found")
+    return rss_data[game]
@@ -1,14 +1,33 @@
 import asyncio
-import threading
+import os
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+import httpx
 from uvicorn import Config, Server
+from uvicorn.supervisors import Multiprocess
 from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi.responses import PlainTextResponse, RedirectResponse
 from fastapi_mcp import FastApiMCP
 
+from app.middleware.compression import CompressionMiddleware
+from app.middleware.http_cache import ConditionalGetMiddleware
 from app.middleware.logging import TrafficLogMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.core import shared_snapshot
+from app.core.base_data import BaseData
+from app.core.heavy_executor import heavy_executor
+from app.core.loop_monitor import LoopLagMonitor
 from app.core.config import app_config
+from app.core import metrics
+from app.core.rate_limit import MCP_TRANSPORT_CLIENT
+from app.utils.compression import ENCODERS
 from app.utils.logger import get_logger
-from app.api import api_router
+from app.api import get_api_router
+
+# 多进程模式下各服务进程通过该工厂函数创建应用
+APP_FACTORY = "app.main:create_app"
 
 
 class Application:
@@ -18,9 +37,22 @@ class Application:
     uvicorn_server: Server | None = None
 
     def __init__(self) -> None:
-        pass
+        self.loop_monitor = LoopLagMonitor()
+
+    @asynccontextmanager
+    async def lifespan(self, fastapi_app: FastAPI) -> AsyncIterator[None]:
+        """
+        每个服务进程的事件循环启动后开始监控事件循环延迟，
+        退出时停止监控并关闭耗时请求线程池
+        """
+        self.loop_monitor.start()
+        try:
+            yield
+        finally:
+            await self.loop_monitor.stop()
+            heavy_executor.shutdown()
 
-    async def set_fastapi_app(self, fastapi_app: FastAPI) -> None:
+    def set_fastapi_app(self, fastapi_app: FastAPI) -> None:
         self.fastapi_app = fastapi_app
 
         @self.fastapi_app.get("/", include_in_schema=False)
@@ -31,41 +63,126 @@ class Application:
         async def health_check():
             return {"status": "ok"}
 
+        @self.fastapi_app.get(
+            "/metrics", tags=["System"], response_class=PlainTextResponse
+        )
+        async def metrics_endpoint():
+            return PlainTextResponse(
+                metrics.registry.render(), media_type=metrics.CONTENT_TYPE
+            )
+
+        # 压缩位于最内层，只处理路由直接返回的完整响应体；
+        # 条件请求中间件在其外层，返回 304 时不进入路由处理及压缩
+        self.fastapi_app.add_middleware(CompressionMiddleware)
+        self.fastapi_app.add_middleware(ConditionalGetMiddleware)
+        # 限流位于日志和指标内层，被拒绝的请求同样会被记录
+        self.fastapi_app.add_middleware(RateLimitMiddleware)
         self.fastapi_app.add_middleware(TrafficLogMiddleware)
-        self.fastapi_app.include_router(api_router)
+        self.fastapi_app.add_middleware(MetricsMiddleware)
+        self.fastapi_app.include_router(get_api_router())
+
+    def mcp_http_client(self) -> httpx.AsyncClient:
+        """
+        MCP 工具调用请求本服务所用的进程内客户端，设置与 fastapi_mcp 默认的相同，
+        只是以 MCP_TRANSPORT_CLIENT 作为客户端地址，供限流识别
+        """
+        return httpx.AsyncClient(
+            transport=httpx.ASGITransport(
+                app=self.fastapi_app,
+                raise_app_exceptions=False,
+                client=MCP_TRANSPORT_CLIENT,
+            ),
+            base_url="http://apiserver",
+            timeout=10.0,
+        )
 
-    async def set_fastapi_mcp(self, fastapi_mcp: FastApiMCP) -> None:
+    def set_fastapi_mcp(self, fastapi_mcp: FastApiMCP) -> None:
         self.fastapi_mcp = fastapi_mcp
         self.fastapi_mcp.mount_http()
         self.fastapi_mcp.mount_sse()
 
-    async def run(self) -> None:
-        host = app_config.host
-        port = app_config.port
-        config = Config(
-            app=self.fastapi_app,
-            host=host,
-            port=port,
+    @staticmethod
+    def uvicorn_config(app, **kwargs) -> Config:
+        """按 AppConfig 生成 uvicorn 配置"""
+        return Config(
+            app=app,
+            host=app_config.host,
+            port=app_config.port,
+            loop=app_config.server_loop,
+            http=app_config.server_http,
+            backlog=app_config.server_backlog,
+            timeout_keep_alive=app_config.server_timeout_keep_alive,
+            limit_concurrency=app_config.server_limit_concurrency,
+            timeout_graceful_shutdown=app_config.server_timeout_graceful_shutdown,
+            proxy_headers=app_config.proxy_headers,
+            forwarded_allow_ips=app_config.forwarded_allow_ips,
             reload=False,
-            workers=1,
             log_config=None,
+            **kwargs,
         )
-        self.uvicorn_server = Server(config=config)
-        threading.Thread(target=self.uvicorn_server.run, daemon=True).start()
 
+    @classmethod
+    def loop_factory(cls) -> Callable[[], asyncio.AbstractEventLoop] | None:
+        """SERVER_LOOP 对应的事件循环工厂，传给 asyncio.run"""
+        return cls.uvicorn_config(None).get_loop_factory()
+
+    @staticmethod
+    def _display_address() -> str:
+        host = app_config.host
         display_host = host if host not in ["0.0.0.0", "127.0.0.1"] else "127.0.0.1"
-        self.logger.info(f"服务器已启动，监听地址 http://{display_host}:{port}")
+        return f"http://{display_host}:{app_config.port}"
+
+    async def run(self) -> None:
+        if set(ENCODERS) == {"gzip"}:
+            self.logger.warning(
+                "brotli 与 compression.zstd 均不可用，响应及预压缩内容仅使用 gzip"
+            )
+        if (
+            app_config.rate_limit_rate > 0 or app_config.expensive_rate_limit_rate > 0
+        ) and app_config.forwarded_allow_ips is None:
+            self.logger.warning(
+                "已开启限流但未设置 FORWARDED_ALLOW_IPS，"
+                "经反向代理转发的请求将按代理地址共用同一限额"
+            )
+        if app_config.workers > 1:
+            self._run_workers()
+            return
 
+        # 直接在当前事件循环中运行，由 uvicorn 处理退出信号：
+        # 收到信号后停止接受新连接，等待进行中的请求完成（最多
+        # SERVER_TIMEOUT_GRACEFUL_SHUTDOWN 秒），再执行清理
+        self.uvicorn_server = Server(config=self.uvicorn_config(self.fastapi_app))
+        self.logger.info(f"服务器启动中，监听地址 {self._display_address()}")
+        try:
+            await self.uvicorn_server.serve()
+        finally:
+            self._cleanup()
+
+    def _run_workers(self) -> None:
+        """
+        多进程模式：主进程绑定端口、加载并发布数据，
+        由 uvicorn 启动 WORKERS 个服务进程共享该端口。
+        uvicorn 的进程管理需要在主线程中处理信号，这里会阻塞直到收到退出信号
+        """
+        config = self.uvicorn_config(
+            APP_FACTORY, factory=True, workers=app_config.workers
+        )
+        os.environ.update(shared_snapshot.worker_environ())
+        sock = config.bind_socket()
+
+        self.logger.info(
+            f"服务器已启动（{app_config.workers} 个服务进程），"
+            f"监听地址 {self._display_address()}"
+        )
         try:
-            while True:
-                await asyncio.sleep(1)
-        except (KeyboardInterrupt, asyncio.CancelledError):
-            self.logger.opt(raw=True).info("\n")
-            self.logger.info("正在关闭...")
+            Multiprocess(config, target=Server(config=config).run, sockets=[sock]).run()
         finally:
+            sock.close()
             self._cleanup()
 
     def _cleanup(self) -> None:
-        if self.uvicorn_server:
-            self.uvicorn_server.should_exit = True
+        self.logger.info("正在关闭...")
+        for dataset in BaseData.datasets.values():
+            dataset.close()
+        shared_snapshot.cleanup()
         self.logger.info("应用已停止")
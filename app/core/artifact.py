@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+from datetime import datetime
+from email.utils import format_datetime
+from pathlib import Path
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import app_config
+from app.utils.compression import ENCODERS, THREADPOOL_COMPRESS_SIZE, compress
+from app.utils.http import etag_matches, not_modified_since, select_encoding
+
+
+class Artifact:
+    """
+    常驻内存的响应内容（RSS、ICS、缓存的 JSON 等）及其压缩版本。
+    每种编码只压缩一次，之后直接复用压缩后的字节串。
+    """
+
+    __slots__ = ("body", "encodings", "_etag", "_pending")
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        # 编码 -> 压缩后的内容；压缩后不更小时记为 None
+        self.encodings: dict[str, bytes | None] = {}
+        self._etag: str | None = None
+        # 编码 -> 正在线程池中执行的压缩任务，并发请求同一编码时共用
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def __getstate__(self) -> tuple:
+        return self.body, self.encodings, self._etag
+
+    def __setstate__(self, state: tuple) -> None:
+        self.body, self.encodings, self._etag = state
+        self._pending = {}
+
+    @classmethod
+    def from_file(cls, file_path: Path) -> "Artifact":
+        """读取文件并预先生成所有可用编码的压缩版本"""
+        artifact = cls(file_path.read_bytes())
+        for encoding in ENCODERS:
+            artifact.encode(encoding, best=True)
+        return artifact
+
+    @property
+    def size(self) -> int:
+        """原始内容与已生成的压缩版本占用的总字节数"""
+        return len(self.body) + sum(
+            len(compressed) for compressed in self.encodings.values() if compressed
+        )
+
+    @property
+    def etag(self) -> str:
+        if self._etag is None:
+            self._etag = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        return self._etag
+
+    def _compress(self, encoding: str, best: bool) -> bytes | None:
+        """只计算压缩结果，不修改 encodings，可在其他线程中执行"""
+        compressed = compress(self.body, encoding, best)
+        return compressed if len(compressed) < len(self.body) else None
+
+    def encode(self, encoding: str, best: bool = False) -> bytes | None:
+        """在当前线程压缩并保存，用于加载时预压缩或在事件循环中压缩较小的内容"""
+        if encoding not in self.encodings:
+            self.encodings[encoding] = self._compress(encoding, best)
+        return self.encodings[encoding]
+
+    async def _encode_in_threadpool(self, encoding: str) -> bytes | None:
+        """
+        在线程池中压缩，结果回到事件循环后再写入 encodings，
+        避免事件循环中统计 size 等遍历时被其他线程修改；同一编码只压缩一次
+        """
+        task = self._pending.get(encoding)
+        if task is None:
+            task = asyncio.ensure_future(
+                run_in_threadpool(self._compress, encoding, False)
+            )
+            self._pending[encoding] = task
+
+            def store(task: asyncio.Task) -> None:
+                del self._pending[encoding]
+                if not task.cancelled() and task.exception() is None:
+                    self.encodings[encoding] = task.result()
+
+            task.add_done_callback(store)
+        # 某个请求被取消（如客户端断开）时不取消共用的压缩任务
+        return await asyncio.shield(task)
+
+    async def response(
+        self,
+        request: Request,
+        media_type: str,
+        headers: dict[str, str] | None = None,
+        etag: bool = True,
+        last_modified: datetime | None = None,
+    ) -> Response:
+        """
+        按 Accept-Encoding 返回压缩/原始内容。
+        etag 为 True 时附带基于内容的强 ETag，并在 If-None-Match 命中时返回 304；
+        为 False 时由 ConditionalGetMiddleware 统一添加数据集级别的校验信息。
+        给出 last_modified（内容只取决于数据版本时）时附带 Last-Modified，
+        请求未带 If-None-Match 时按 If-Modified-Since 判断是否返回 304。
+        """
+        encoding = None
+        if len(self.body) >= app_config.compression_min_size:
+            encoding = select_encoding(
+                request.headers.get("accept-encoding", ""), list(ENCODERS)
+            )
+        body = self.body
+        if encoding is not None:
+            if encoding in self.encodings:
+                compressed = self.encodings[encoding]
+            elif len(self.body) > THREADPOOL_COMPRESS_SIZE:
+                compressed = await self._encode_in_threadpool(encoding)
+            else:
+                compressed = self.encode(encoding)
+            if compressed is None:
+                encoding = None
+            else:
+                body = compressed
+
+        response_headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+        if last_modified is not None:
+            response_headers["Last-Modified"] = format_datetime(
+                last_modified, usegmt=True
+            )
+        if etag:
+            # 不同编码是不同的表示，使用不同的强 ETag
+            response_headers["ETag"] = (
+                f'"{self.etag}-{encoding}"' if encoding else f'"{self.etag}"'
+            )
+            if_none_match = request.headers.get("if-none-match")
+            if_modified_since = request.headers.get("if-modified-since")
+            if if_none_match is not None:
+                not_modified = etag_matches(if_none_match, response_headers["ETag"])
+            elif if_modified_since is not None and last_modified is not None:
+                not_modified = not_modified_since(if_modified_since, last_modified)
+            else:
+                not_modified = False
+            if not_modified:
+                return Response(status_code=304, headers=response_headers)
+
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+        return Response(body, media_type=media_type, headers=response_headers)
@@ -1,31 +1,230 @@
+import hashlib
+import multiprocessing
+import signal
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Callable, Iterator, TypeVar
 
 from app.utils.dir_watcher import DirWatcher
 from app.utils.logger import get_logger
+from app.core import shared_snapshot
 from app.core.config import app_config
+from app.core.metrics import (
+    DATASET_GENERATION,
+    DATASET_RELOAD_DURATION,
+    DATASET_RELOADS,
+)
+
+T = TypeVar("T")
+
+_loader_executor: ProcessPoolExecutor | None = None
+_loader_executor_lock = threading.Lock()
+
+
+def _ignore_sigint() -> None:
+    """加载进程忽略 Ctrl-C，由主进程统一处理退出并关闭进程池"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def _get_loader_executor() -> ProcessPoolExecutor:
+    global _loader_executor
+    with _loader_executor_lock:
+        if _loader_executor is None:
+            # 使用 spawn 启动工作进程，避免在已有多个线程（监控、定时器）的进程中 fork
+            _loader_executor = ProcessPoolExecutor(
+                max_workers=app_config.loader_processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_ignore_sigint,
+            )
+        return _loader_executor
+
+
+def _reset_loader_executor() -> None:
+    global _loader_executor
+    with _loader_executor_lock:
+        if _loader_executor is not None:
+            _loader_executor.shutdown(wait=False, cancel_futures=True)
+        _loader_executor = None
 
 
 class BaseData(ABC):
     logger = get_logger("DATA")
+    # 所有数据集实例，按数据子目录（即接口路径前缀）索引
+    datasets: dict[str, "BaseData"] = {}
+    # 数据快照，子类在加载/删除文件时整体替换；
+    # 多进程模式下由主进程序列化后发布，服务进程直接使用
+    snapshot = None
 
     def __init__(self, data_subdir: str) -> None:
+        self.name = data_subdir
         self.watch_dir = (app_config.data_dir / data_subdir).resolve()
         self.data = None
+        # 数据版本号，每次文件加载/删除后递增，用于使缓存失效
+        self.generation = 0
+        self._generation_lock = threading.Lock()
+        # 串行化数据更新：各文件的防抖定时器运行在不同线程中，
+        # 快照的“复制-修改-替换”需要互斥，避免后完成的更新覆盖先完成的
+        self._reload_lock = threading.Lock()
+        # 内容版本（由文件路径、大小、修改时间计算）及最后修改时间，用于 HTTP 缓存校验
+        self.version = ""
+        self.last_modified = datetime.now(timezone.utc)
+        BaseData.datasets[data_subdir] = self
+
+        if shared_snapshot.is_worker():
+            # 服务进程不读取原始数据，只订阅主进程发布的快照
+            self.snapshot_path = shared_snapshot.snapshot_path(data_subdir)
+            self.load_published(self.snapshot_path)
+            self.dir_watcher = DirWatcher(
+                self.snapshot_path.parent,
+                self.load_published,
+                lambda file_path: None,
+            )
+            self.dir_watcher.start()
+            return
 
         self.load_all()
 
         self.dir_watcher = DirWatcher(
             self.watch_dir,
-            self.load_file,
-            self.on_file_deleted,
+            self.reload_file,
+            self.remove_file,
         )
         self.dir_watcher.start()
 
     def load_all(self) -> None:
-        for file_path in self.watch_dir.rglob("*"):
-            if file_path.is_file():
+        start_time = time.perf_counter()
+        with self._reload_lock, self._track_reload("load_all"):
+            try:
+                for file_path in self.watch_dir.rglob("*"):
+                    if file_path.is_file():
+                        self.load_file(file_path)
+            finally:
+                self.bump_generation()
+        elapsed = (time.perf_counter() - start_time) * 1000
+        self.logger.info(f"加载数据集 {self.name} 完成，耗时 {elapsed:.2f}ms")
+
+    def reload_file(self, file_path: Path) -> None:
+        """加载变更的文件，并递增数据版本号"""
+        start_time = time.perf_counter()
+        with self._reload_lock, self._track_reload("reload"):
+            try:
                 self.load_file(file_path)
+            finally:
+                self.bump_generation()
+        if file_path.is_file():
+            elapsed = (time.perf_counter() - start_time) * 1000
+            relative_path = file_path.relative_to(self.watch_dir).as_posix()
+            self.logger.info(
+                f"重新加载 {self.name}/{relative_path}，耗时 {elapsed:.2f}ms"
+            )
+
+    @contextmanager
+    def _track_reload(self, operation: str) -> Iterator[None]:
+        """记录一次加载的耗时及结果（成功/抛出异常）"""
+        start_time = time.perf_counter()
+        result = "failure"
+        try:
+            yield
+            result = "success"
+        finally:
+            DATASET_RELOADS.inc(self.name, operation, result)
+            DATASET_RELOAD_DURATION.observe(
+                time.perf_counter() - start_time, self.name, operation
+            )
+
+    def run_loader(self, func: Callable[..., T], *args) -> T:
+        """
+        在工作进程中执行解析/索引构建等 CPU 密集的加载任务并返回结果，
+        避免长时间占用服务进程的 GIL。func 及其结果需可被 pickle，
+        且 func 所在模块导入时不能有副作用（如实例化数据集）。
+        LOADER_PROCESSES 为 0 时直接在当前线程执行。
+        """
+        if app_config.loader_processes <= 0:
+            return func(*args)
+        try:
+            return _get_loader_executor().submit(func, *args).result()
+        except BrokenProcessPool as e:
+            self.logger.warning(f"加载进程异常退出，改为在当前线程加载: {e}")
+            _reset_loader_executor()
+            return func(*args)
+
+    def remove_file(self, file_path: Path) -> None:
+        """处理被删除的文件，并递增数据版本号"""
+        with self._reload_lock, self._track_reload("remove"):
+            try:
+                self.on_file_deleted(file_path)
+            finally:
+                self.bump_generation()
+
+    def bump_generation(self) -> None:
+        with self._generation_lock:
+            self.generation += 1
+            self._refresh_version()
+            DATASET_GENERATION.set(self.name, value=self.generation)
+        if shared_snapshot.is_publisher():
+            start_time = time.perf_counter()
+            shared_snapshot.publish(
+                self.name,
+                (self.snapshot, self.generation, self.version, self.last_modified),
+            )
+            elapsed = (time.perf_counter() - start_time) * 1000
+            self.logger.debug(f"发布数据集 {self.name} 快照，耗时 {elapsed:.2f}ms")
+
+    def load_published(self, file_path: Path) -> None:
+        """服务进程：读取主进程发布的快照并替换当前数据"""
+        if file_path.name != self.snapshot_path.name or not file_path.is_file():
+            return
+        with self._track_reload("snapshot"):
+            snapshot, generation, version, last_modified = shared_snapshot.read(
+                self.snapshot_path
+            )
+        # 先替换数据再更新版本号，与主进程中的更新顺序一致，
+        # 保证按新版本号缓存的响应不会基于旧数据生成
+        self.snapshot = snapshot
+        self.version = version
+        self.last_modified = last_modified
+        with self._generation_lock:
+            self.generation = generation
+            DATASET_GENERATION.set(self.name, value=generation)
+
+    def _refresh_version(self) -> None:
+        digest = hashlib.blake2b(digest_size=8)
+        latest_mtime = 0
+        for file_path in sorted(self.watch_dir.rglob("*")):
+            try:
+                stat = file_path.stat()
+            except OSError:
+                continue
+            if not file_path.is_file():
+                continue
+            relative_path = file_path.relative_to(self.watch_dir).as_posix()
+            digest.update(
+                f"{relative_path}:{stat.st_size}:{stat.st_mtime_ns};".encode()
+            )
+            latest_mtime = max(latest_mtime, stat.st_mtime)
+
+        version = digest.hexdigest()
+        if version == self.version:
+            return
+        latest = datetime.fromtimestamp(latest_mtime, timezone.utc).replace(
+            microsecond=0
+        )
+        # 删除文件时修改时间不会增加，此时以当前时间作为最后修改时间
+        if self.version and latest <= self.last_modified:
+            latest = datetime.now(timezone.utc).replace(microsecond=0)
+        self.version = version
+        self.last_modified = latest
+
+    def close(self) -> None:
+        """停止监控并关闭加载进程，应用退出时调用"""
+        self.dir_watcher.stop()
+        _reset_loader_executor()
 
     @abstractmethod
     def load_file(self, file_path: Path) -> None:
@@ -1,4 +1,5 @@
 from pathlib import Path
+from typing import Literal
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -15,9 +16,109 @@ class AppConfig(BaseSettings):
 
     debug: bool = Field(default=False, description="调试模式")
     log_level: str = Field(default="INFO", description="日志级别")
+    access_log_sample_rate: float = Field(
+        default=1.0,
+        ge=0,
+        le=1,
+        description="2xx/3xx 访问日志的采样比例，4xx/5xx 与慢请求总是记录",
+    )
+    access_log_slow_ms: float = Field(
+        default=1000, description="耗时超过该值（毫秒）的请求总是记录访问日志"
+    )
+    loop_lag_interval: float = Field(
+        default=0.1, description="事件循环延迟的探测间隔（秒），0 表示关闭监控"
+    )
+    loop_block_threshold_ms: float = Field(
+        default=200,
+        description="事件循环被阻塞超过该值（毫秒）时记录当前请求及调用栈",
+    )
     host: str = Field(default="0.0.0.0", description="主机地址")
     port: int = Field(default=8888, description="端口号")
+    server_loop: Literal["auto", "asyncio", "uvloop"] = Field(
+        default="auto", description="事件循环实现，auto 表示已安装 uvloop 时使用 uvloop"
+    )
+    server_http: Literal["auto", "h11", "httptools"] = Field(
+        default="auto",
+        description="HTTP 协议实现，auto 表示已安装 httptools 时使用 httptools",
+    )
+    server_backlog: int = Field(default=2048, description="监听队列长度")
+    server_timeout_keep_alive: int = Field(
+        default=5, description="空闲 keep-alive 连接的超时时间（秒）"
+    )
+    server_limit_concurrency: int | None = Field(
+        default=None,
+        description="最大并发连接/任务数，超出后返回 503，不设置表示不限制",
+    )
+    proxy_headers: bool = Field(
+        default=True,
+        description="是否按 X-Forwarded-For / X-Forwarded-Proto 还原客户端地址（仅对受信任的代理生效）",
+    )
+    forwarded_allow_ips: str | None = Field(
+        default=None,
+        description="受信任的反向代理地址，逗号分隔，* 表示信任所有来源；"
+        "限流按还原后的客户端 IP 计算。不设置时为 127.0.0.1",
+    )
+    server_timeout_graceful_shutdown: int | None = Field(
+        default=30,
+        description="退出时等待进行中的请求完成的最长时间（秒），不设置表示一直等待",
+    )
+    # 限流默认关闭：部署在反向代理/CDN 之后时，需先设置 FORWARDED_ALLOW_IPS，
+    # 否则所有请求都按代理地址计算，共用同一个令牌桶
+    rate_limit_rate: float = Field(
+        default=0,
+        description="每个客户端 IP 每秒允许的请求数（令牌补充速率），0 表示不限流",
+    )
+    rate_limit_burst: int = Field(
+        default=40, description="每个客户端 IP 允许的突发请求数（令牌桶容量）"
+    )
+    expensive_rate_limit_rate: float = Field(
+        default=0,
+        description="每个客户端 IP 每秒允许的耗时请求（全量列表、跨游戏搜索、大分页）数，0 表示不限流",
+    )
+    expensive_rate_limit_burst: int = Field(
+        default=5, description="每个客户端 IP 允许的突发耗时请求数"
+    )
+    expensive_max_concurrency: int = Field(
+        default=4,
+        description="同时处理的耗时请求上限，超出后返回 503，0 表示不限制",
+    )
+    heavy_executor_threads: int = Field(
+        default=2,
+        description="执行耗时请求（全量列表、跨游戏搜索、大分页）的线程数，0 表示直接在事件循环中执行",
+    )
+    heavy_executor_queue: int = Field(
+        default=32,
+        description="耗时请求线程池中允许排队的调用数，超出后返回 503",
+    )
     data_dir: Path = Field(default=Path(".temp/data"), description="数据目录")
+    workers: int = Field(
+        default=1,
+        description="服务进程数；大于 1 时由主进程加载数据并发布只读快照，各服务进程共享监听端口",
+    )
+    calendar_utc_offset: float = Field(
+        default=8, description="日历数据中不带时区的时间所属的 UTC 偏移（小时）"
+    )
+    loader_processes: int = Field(
+        default=1,
+        description="解析数据文件、构建索引所用的工作进程数，0 表示在监控线程中直接加载",
+    )
+    response_cache_size: int = Field(
+        default=1024, description="每个数据集的响应缓存最大条目数，0 表示关闭"
+    )
+    response_cache_max_bytes: int = Field(
+        default=64 * 1024 * 1024,
+        description="每个数据集的响应缓存占用的最大字节数（含压缩版本），0 表示关闭",
+    )
+    compression_min_size: int = Field(
+        default=1024, description="响应体达到该字节数时才进行压缩"
+    )
+    cache_max_age: int = Field(
+        default=60, description="数据接口 Cache-Control 的 max-age（秒）"
+    )
+    cache_stale_while_revalidate: int = Field(
+        default=300,
+        description="数据接口 Cache-Control 的 stale-while-revalidate（秒）",
+    )
 
 
 app_config = AppConfig()
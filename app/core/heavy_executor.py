@@ -0,0 +1,92 @@
+"""
+耗时请求（全量列表、跨游戏搜索、大分页等）的执行线程池。
+
+服务函数虽然是 async def，但内部都是纯计算，直接执行会占用事件循环，
+期间其他请求（包括 /health 这类轻量接口）都无法得到处理。
+这类调用放到有限大小的线程池中执行，事件循环在等待期间可继续处理其他请求；
+排队的调用超过上限时直接以 503 拒绝，而不是无限堆积。
+"""
+
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+from app.core.config import app_config
+from app.core.metrics import HEAVY_EXECUTOR_PENDING, HEAVY_EXECUTOR_REJECTED
+
+T = TypeVar("T")
+
+
+class ExecutorSaturatedError(HTTPException):
+    """线程池繁忙，调用被拒绝"""
+
+    def __init__(self, retry_after: int = 1) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务繁忙，请稍后重试",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class HeavyExecutor:
+    def __init__(
+        self, max_workers: int | None = None, max_queue: int | None = None
+    ) -> None:
+        self.max_workers = (
+            app_config.heavy_executor_threads if max_workers is None else max_workers
+        )
+        self.max_queue = (
+            app_config.heavy_executor_queue if max_queue is None else max_queue
+        )
+        self._executor: ThreadPoolExecutor | None = None
+        # 已提交但尚未完成（执行中及排队中）的调用数。
+        # 在调用实际结束时才减少，客户端断开后仍在执行的调用也计算在内
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="heavy"
+            )
+        return self._executor
+
+    def _release(self, future: Future | None) -> None:
+        with self._lock:
+            self._pending -= 1
+            HEAVY_EXECUTOR_PENDING.set(value=self._pending)
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        在线程池中执行 func(*args) 并等待结果。
+        HEAVY_EXECUTOR_THREADS 为 0 时直接在当前线程执行；
+        执行中及排队中的调用已达上限时抛出 ExecutorSaturatedError
+        """
+        if self.max_workers <= 0:
+            return func(*args)
+
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                HEAVY_EXECUTOR_REJECTED.inc()
+                raise ExecutorSaturatedError()
+            self._pending += 1
+            HEAVY_EXECUTOR_PENDING.set(value=self._pending)
+        try:
+            future = self._get_executor().submit(partial(func, *args))
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+heavy_executor = HeavyExecutor()
@@ -0,0 +1,117 @@
+"""
+事件循环延迟监控。
+
+- 探测任务每隔 LOOP_LAG_INTERVAL 秒休眠一次，实际唤醒时间与预期的差值即调度延迟，
+  计入 event_loop_lag_seconds 指标
+- 监控线程检查探测任务是否按时唤醒，超出 LOOP_BLOCK_THRESHOLD_MS 仍未唤醒时，
+  说明有回调长时间占用事件循环，记录当前正在执行的请求及事件循环线程的调用栈
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from contextvars import ContextVar
+
+from starlette.types import Scope
+
+from app.core.config import app_config
+from app.core.metrics import EVENT_LOOP_BLOCKS, EVENT_LOOP_LAG
+from app.utils.logger import get_logger
+
+# 当前任务正在处理的请求，由 MetricsMiddleware 设置；
+# 请求处理中创建的子任务会继承该值
+current_request: ContextVar[Scope | None] = ContextVar("current_request", default=None)
+
+
+def _describe_request(scope: Scope | None) -> str:
+    if scope is None:
+        return "-"
+    # 路由匹配后使用路由模板，否则使用原始路径
+    path = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+class LoopLagMonitor:
+    logger = get_logger("LOOP")
+
+    def __init__(
+        self, interval: float | None = None, threshold_ms: float | None = None
+    ) -> None:
+        self.interval = app_config.loop_lag_interval if interval is None else interval
+        self.threshold = (
+            app_config.loop_block_threshold_ms if threshold_ms is None else threshold_ms
+        ) / 1000
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id = 0
+        self._task: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+        # 探测任务预期的下一次唤醒时间（time.monotonic），及已报告过的唤醒时间
+        self._expected_wakeup = 0.0
+        self._reported_wakeup = 0.0
+
+    def start(self) -> None:
+        """在事件循环线程中调用"""
+        if self.interval <= 0 or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._expected_wakeup = time.monotonic() + self.interval
+        self._stopped.clear()
+        self._task = self._loop.create_task(self._probe())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-lag-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self._watchdog.join()
+        self._watchdog = None
+
+    async def _probe(self) -> None:
+        while True:
+            self._expected_wakeup = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - self._expected_wakeup)
+            EVENT_LOOP_LAG.observe(lag)
+            if lag >= self.threshold:
+                EVENT_LOOP_BLOCKS.inc()
+                self.logger.warning(f"事件循环被阻塞 {lag * 1000:.2f}ms")
+
+    def _watch(self) -> None:
+        # 检查间隔取阈值的一半，阻塞超过阈值后最多再过半个阈值即可发现
+        check_interval = max(self.threshold / 2, 0.01)
+        while not self._stopped.wait(check_interval):
+            expected_wakeup = self._expected_wakeup
+            overdue = time.monotonic() - expected_wakeup
+            if overdue < self.threshold or expected_wakeup == self._reported_wakeup:
+                continue
+            # 同一次阻塞只报告一次
+            self._reported_wakeup = expected_wakeup
+            self._report(overdue)
+
+    def _report(self, overdue: float) -> None:
+        request = "-"
+        try:
+            # 读取事件循环当前执行的任务及其上下文中的请求
+            task = asyncio.current_task(self._loop)
+            if task is not None:
+                request = _describe_request(task.get_context().get(current_request))
+        except RuntimeError:
+            pass
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+        self.logger.warning(
+            f"事件循环已被阻塞 {overdue * 1000:.2f}ms，当前请求: {request}\n{stack}"
+        )
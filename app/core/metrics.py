@@ -0,0 +1,262 @@
+"""
+进程内指标，以 Prometheus 文本格式通过 /metrics 导出。
+
+多进程模式（WORKERS > 1）下每个服务进程各自统计，
+抓取到的是处理该次请求的进程的数据。
+"""
+
+import math
+import threading
+from bisect import bisect_left
+from typing import Iterable
+
+# 请求耗时（秒）的默认分桶
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 响应体大小（字节）的分桶
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+# 数据加载耗时（秒）的分桶
+LOAD_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    带标签的指标基类，各标签值组合对应一个时间序列。
+    更新可能来自事件循环和文件监控线程，用锁保护
+    """
+
+    type = ""
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        # 无标签的指标从 0 开始导出
+        self._values: dict[tuple[str, ...], float] = {} if labelnames else {(): 0}
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+            for labels, value in values
+        ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, *labelvalues: str, value: float) -> None:
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram(Metric):
+    """分桶计数在导出时累加，observe 只需更新落入的桶"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 标签值 -> [各桶计数..., 总和]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labelvalues)
+            if counts is None:
+                counts = self._values[labelvalues] = [0] * (len(self.buckets) + 1)
+            counts[index] += 1
+            counts[-1] += value
+
+    def _samples(self) -> list[str]:
+        with self._lock:
+            values = [(labels, list(counts)) for labels, counts in self._values.items()]
+        lines = []
+        labelnames = self.labelnames + ("le",)
+        for labels, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = _format_labels(
+                    labelnames, labels + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series_labels = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{series_labels} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{series_labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: tuple[str, ...] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+
+registry = MetricsRegistry()
+
+# HTTP 请求，route 为匹配到的路由模板（如 /hoyo_video/{game}），未匹配时为 unmatched
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP 请求总数", ("method", "route", "status")
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP 请求耗时（秒），从收到请求到响应体发送完毕",
+    ("method", "route"),
+)
+HTTP_RESPONSE_SIZE = registry.histogram(
+    "http_response_size_bytes",
+    "HTTP 响应体大小（字节，压缩后）",
+    ("method", "route"),
+    SIZE_BUCKETS,
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "正在处理的 HTTP 请求数"
+)
+
+# 事件循环
+EVENT_LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds",
+    "事件循环调度延迟（秒）",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+EVENT_LOOP_BLOCKS = registry.counter(
+    "event_loop_blocks_total", "调度延迟超过 LOOP_BLOCK_THRESHOLD_MS 的次数"
+)
+
+# 耗时请求线程池
+HEAVY_EXECUTOR_PENDING = registry.gauge(
+    "heavy_executor_pending", "耗时请求线程池中执行中及排队中的调用数"
+)
+HEAVY_EXECUTOR_REJECTED = registry.counter(
+    "heavy_executor_rejected_total", "耗时请求线程池繁忙时被拒绝的调用数"
+)
+
+# 准入控制，reason 为 rate（超出限流）或 concurrency（耗时请求并发已满）
+RATE_LIMIT_REJECTIONS = registry.counter(
+    "rate_limit_rejections_total",
+    "被准入控制拒绝的请求数",
+    ("route_class", "reason"),
+)
+EXPENSIVE_IN_FLIGHT = registry.gauge(
+    "expensive_requests_in_flight", "正在处理的耗时请求数"
+)
+
+# 数据集加载，operation 为 load_all / reload / remove / snapshot
+DATASET_RELOADS = registry.counter(
+    "dataset_reloads_total",
+    "数据集加载次数，result 为 success 或 failure",
+    ("dataset", "operation", "result"),
+)
+DATASET_RELOAD_DURATION = registry.histogram(
+    "dataset_reload_duration_seconds",
+    "数据集加载耗时（秒）",
+    ("dataset", "operation"),
+    LOAD_BUCKETS,
+)
+DATASET_GENERATION = registry.gauge(
+    "dataset_generation", "数据集当前的数据版本号", ("dataset",)
+)
+
+# 目录监控
+WATCHER_EVENTS = registry.counter(
+    "dir_watcher_events_total", "目录监控收到的文件事件数", ("event",)
+)
+WATCHER_CALLBACK_ERRORS = registry.counter(
+    "dir_watcher_callback_errors_total", "目录监控回调执行失败次数"
+)
+
+# 响应缓存，命中率 = hit / (hit + miss)
+RESPONSE_CACHE_REQUESTS = registry.counter(
+    "response_cache_requests_total",
+    "响应缓存查询次数，result 为 hit 或 miss",
+    ("cache", "result"),
+)
+RESPONSE_CACHE_ENTRIES = registry.gauge(
+    "response_cache_entries", "响应缓存当前条目数", ("cache",)
+)
+RESPONSE_CACHE_BYTES = registry.gauge(
+    "response_cache_bytes", "响应缓存当前占用的字节数（含压缩版本）", ("cache",)
+)
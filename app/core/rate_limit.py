@@ -0,0 +1,151 @@
+"""
+请求准入控制：
+
+- 按客户端 IP 的令牌桶限流，普通请求与耗时请求（全量列表、跨游戏搜索、大分页）
+  分别计算，超出时返回 429 及 Retry-After
+- 耗时请求的全局并发上限，已满时直接返回 503 及 Retry-After，
+  不让单个客户端占满服务进程
+
+客户端 IP 取自 ASGI scope；部署在反向代理之后时由 uvicorn 按
+X-Forwarded-For 还原，只信任 FORWARDED_ALLOW_IPS 中的代理地址。
+MCP 工具调用通过进程内的 ASGI 传输再次请求本服务，这些请求按发起 MCP 请求的
+客户端单独计算（见 MCP_CLIENT_HEADER），不与其他 MCP 客户端共用一个令牌桶。
+所有状态只在事件循环线程中访问，无需加锁。
+"""
+
+import math
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import HTTPException, Request, status
+from starlette.datastructures import Headers
+from starlette.types import Scope
+
+from app.core.config import app_config
+from app.core.metrics import EXPENSIVE_IN_FLIGHT, RATE_LIMIT_REJECTIONS
+
+DEFAULT_CLASS = "default"
+EXPENSIVE_CLASS = "expensive"
+
+# 每类请求最多保留的客户端数，超出后淘汰最久未访问的（其令牌桶重新计满）
+_MAX_CLIENTS = 10000
+
+# MCP 的挂载路径（fastapi_mcp 的默认值）
+MCP_PATH_PREFIXES = ("/mcp", "/sse")
+# 进程内 MCP 工具调用（httpx.ASGITransport）使用的客户端地址，真实连接不会出现该地址
+MCP_TRANSPORT_CLIENT = ("mcp", 0)
+# MCP 请求的客户端 IP 由 RateLimitMiddleware 写入该请求头，
+# 再由 fastapi_mcp 转发给工具调用
+MCP_CLIENT_HEADER = "x-mcp-client-ip"
+
+
+class RateLimitedError(HTTPException):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="请求过于频繁，请稍后重试",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class ConcurrencyLimitedError(HTTPException):
+    def __init__(self, retry_after: int = 1) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="服务繁忙，请稍后重试",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+def client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    if client and tuple(client) == MCP_TRANSPORT_CLIENT:
+        # 只有进程内的工具调用才信任该请求头，外部请求无法伪造
+        return f"mcp:{Headers(scope=scope).get(MCP_CLIENT_HEADER, '-')}"
+    return client[0] if client else "-"
+
+
+class TokenBucketLimiter:
+    """
+    每个客户端一个令牌桶：容量为 burst，每秒补充 rate 个令牌，
+    每个请求消耗一个。rate 为 0 表示不限制
+    """
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = max(burst, 1)
+        # 客户端 -> (剩余令牌数, 上次更新时间)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def acquire(self, client: str) -> float:
+        """消耗一个令牌；成功返回 0，否则返回需要等待的秒数"""
+        if self.rate <= 0:
+            return 0
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > _MAX_CLIENTS:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class ConcurrencyLimiter:
+    """同时执行的调用数上限，0 表示不限制"""
+
+    def __init__(self, limit: int) -> None:
+        self.limit = limit
+        self.active = 0
+
+    def try_acquire(self) -> bool:
+        if self.limit > 0 and self.active >= self.limit:
+            return False
+        self.active += 1
+        return True
+
+    def release(self) -> None:
+        self.active -= 1
+
+
+limiters = {
+    DEFAULT_CLASS: TokenBucketLimiter(
+        app_config.rate_limit_rate, app_config.rate_limit_burst
+    ),
+    EXPENSIVE_CLASS: TokenBucketLimiter(
+        app_config.expensive_rate_limit_rate, app_config.expensive_rate_limit_burst
+    ),
+}
+expensive_concurrency = ConcurrencyLimiter(app_config.expensive_max_concurrency)
+
+
+def check_rate(route_class: str, client: str) -> None:
+    """超出该类请求的限流时抛出 RateLimitedError"""
+    wait = limiters[route_class].acquire(client)
+    if wait > 0:
+        RATE_LIMIT_REJECTIONS.inc(route_class, "rate")
+        raise RateLimitedError(math.ceil(wait))
+
+
+@asynccontextmanager
+async def expensive_call(request: Request) -> AsyncIterator[None]:
+    """
+    耗时请求的准入控制，在路由中包裹实际的处理过程：
+    先按客户端检查耗时请求的限流，再占用一个全局并发名额，处理结束后释放
+    """
+    check_rate(EXPENSIVE_CLASS, client_ip(request.scope))
+    if not expensive_concurrency.try_acquire():
+        RATE_LIMIT_REJECTIONS.inc(EXPENSIVE_CLASS, "concurrency")
+        raise ConcurrencyLimitedError()
+    EXPENSIVE_IN_FLIGHT.inc()
+    try:
+        yield
+    finally:
+        expensive_concurrency.release()
+        EXPENSIVE_IN_FLIGHT.dec()
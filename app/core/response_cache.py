@@ -0,0 +1,158 @@
+from collections import OrderedDict
+from contextlib import nullcontext
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Request
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+from app.core.artifact import Artifact
+from app.core.base_data import BaseData
+from app.core.config import app_config
+from app.core.heavy_executor import heavy_executor
+from app.core.rate_limit import expensive_call
+from app.core.metrics import (
+    RESPONSE_CACHE_BYTES,
+    RESPONSE_CACHE_ENTRIES,
+    RESPONSE_CACHE_REQUESTS,
+)
+
+
+def _encode_model(model: BaseModel) -> bytes:
+    return model.model_dump_json().encode("utf-8")
+
+
+class ResponseCache:
+    """
+    按 (路由, 参数) 缓存已编码的响应体（JSON、动态生成的 ICS 等）（及按需生成的压缩版本），
+    同时限制条目数与总字节数，LRU 淘汰。
+    缓存与数据集的版本号绑定，数据重新加载后整体失效。
+    """
+
+    def __init__(
+        self,
+        source: BaseData,
+        maxsize: int | None = None,
+        max_bytes: int | None = None,
+    ) -> None:
+        self.source = source
+        self.maxsize = app_config.response_cache_size if maxsize is None else maxsize
+        self.max_bytes = (
+            app_config.response_cache_max_bytes if max_bytes is None else max_bytes
+        )
+        self.generation = source.generation
+        self._entries: OrderedDict[Hashable, Artifact] = OrderedDict()
+        # 各条目计入总量的字节数；压缩版本在写入缓存后才按需生成，响应时重新统计
+        self._sizes: dict[Hashable, int] = {}
+        self.total_bytes = 0
+
+    def _update_metrics(self) -> None:
+        RESPONSE_CACHE_ENTRIES.set(self.source.name, value=len(self._entries))
+        RESPONSE_CACHE_BYTES.set(self.source.name, value=self.total_bytes)
+
+    def _sync_generation(self) -> int:
+        generation = self.source.generation
+        if generation != self.generation:
+            self._entries.clear()
+            self._sizes.clear()
+            self.total_bytes = 0
+            self.generation = generation
+            self._update_metrics()
+        return generation
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.maxsize or self.total_bytes > self.max_bytes
+        ):
+            key, _ = self._entries.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(key)
+
+    def _account(self, key: Hashable, artifact: Artifact) -> None:
+        """重新统计条目占用的字节数，超出上限时淘汰最久未使用的条目"""
+        if self._entries.get(key) is not artifact:
+            return
+        size = artifact.size
+        self.total_bytes += size - self._sizes.get(key, 0)
+        self._sizes[key] = size
+        self._evict()
+        self._update_metrics()
+
+    def get(self, key: Hashable) -> Artifact | None:
+        self._sync_generation()
+        artifact = self._entries.get(key)
+        if artifact is not None:
+            self._entries.move_to_end(key)
+        RESPONSE_CACHE_REQUESTS.inc(
+            self.source.name, "miss" if artifact is None else "hit"
+        )
+        return artifact
+
+    def set(self, key: Hashable, artifact: Artifact, generation: int) -> None:
+        # 构建期间数据已被重新加载，结果可能是旧数据，不写入缓存；
+        # 单个响应体已超过字节上限时也不缓存
+        if (
+            self.maxsize <= 0
+            or artifact.size > self.max_bytes
+            or self._sync_generation() != generation
+        ):
+            return
+        self._entries[key] = artifact
+        self._entries.move_to_end(key)
+        self._account(key, artifact)
+
+    async def get_or_create(
+        self, key: Hashable, build: Callable[[], Awaitable[bytes]]
+    ) -> Artifact:
+        """命中缓存时直接返回，否则调用 build 生成响应体并缓存"""
+        artifact = self.get(key)
+        if artifact is None:
+            generation = self.source.generation
+            artifact = Artifact(await build())
+            self.set(key, artifact, generation)
+        return artifact
+
+    async def response(
+        self,
+        request: Request,
+        key: Hashable,
+        artifact: Artifact,
+        media_type: str,
+        headers: dict[str, str] | None = None,
+        etag: bool = True,
+    ) -> Response:
+        """
+        返回缓存条目的响应（参数同 Artifact.response），
+        并把此次按需生成的压缩版本计入缓存占用
+        """
+        response = await artifact.response(request, media_type, headers, etag)
+        self._account(key, artifact)
+        return response
+
+    async def get_or_build(
+        self,
+        request: Request,
+        key: Hashable,
+        build: Callable[[], Awaitable[BaseModel]],
+        offload: bool = False,
+        etag: bool = False,
+        expensive: bool = False,
+    ) -> Response:
+        """
+        命中缓存时直接返回已编码的响应体，否则调用 build 生成并缓存；
+        压缩版本在首次被请求时生成，之后复用。
+        offload 为 True 时（响应体较大）在耗时请求线程池中编码；
+        etag 为 True 时使用基于内容的 ETag（结果不只取决于数据版本时）；
+        expensive 为 True 时，生成与编码过程按耗时请求做准入控制，命中缓存时不计入
+        """
+
+        async def build_body() -> bytes:
+            async with expensive_call(request) if expensive else nullcontext():
+                model = await build()
+                if offload:
+                    return await heavy_executor.run(_encode_model, model)
+                return _encode_model(model)
+
+        artifact = await self.get_or_create(key, build_body)
+        return await self.response(
+            request, key, artifact, "application/json", etag=etag
+        )
@@ -0,0 +1,89 @@
+"""
+多进程模式（WORKERS > 1）下在主进程与服务进程之间共享数据快照。
+
+主进程负责监控数据目录和加载数据，每次数据更新后将快照序列化，
+写入共享内存目录（/dev/shm，不可用时为临时目录）中的文件；
+服务进程以只读方式映射该文件并反序列化，不再各自解析原始数据、各自监控数据目录。
+"""
+
+import mmap
+import os
+import pickle
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from app.core.config import app_config
+
+# 由主进程在启动服务进程前设置，服务进程据此判断自身角色及快照位置
+ROLE_ENV = "HOYO_INFO_API_ROLE"
+SNAPSHOT_DIR_ENV = "HOYO_INFO_API_SNAPSHOT_DIR"
+WORKER_ROLE = "worker"
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# 在导入时确定角色：主进程随后会为服务进程设置这些环境变量，自身角色不应随之改变
+_is_worker = os.environ.get(ROLE_ENV) == WORKER_ROLE
+_snapshot_dir: Path | None = None
+_snapshot_dir_lock = threading.Lock()
+
+
+def is_worker() -> bool:
+    """当前进程是否为只订阅快照的服务进程"""
+    return _is_worker
+
+
+def is_publisher() -> bool:
+    """当前进程是否为负责加载并发布快照的主进程"""
+    return app_config.workers > 1 and not is_worker()
+
+
+def snapshot_dir() -> Path:
+    global _snapshot_dir
+    with _snapshot_dir_lock:
+        if _snapshot_dir is None:
+            if is_worker():
+                _snapshot_dir = Path(os.environ[SNAPSHOT_DIR_ENV])
+            else:
+                base_dir = "/dev/shm" if os.path.isdir("/dev/shm") else None
+                _snapshot_dir = Path(
+                    tempfile.mkdtemp(prefix="hoyo-info-api-", dir=base_dir)
+                )
+        return _snapshot_dir
+
+
+def snapshot_path(name: str) -> Path:
+    return snapshot_dir() / f"{name}{SNAPSHOT_SUFFIX}"
+
+
+def worker_environ() -> dict[str, str]:
+    """启动服务进程前需设置的环境变量"""
+    return {ROLE_ENV: WORKER_ROLE, SNAPSHOT_DIR_ENV: str(snapshot_dir())}
+
+
+def publish(name: str, state: object) -> None:
+    """
+    发布数据集快照。先写入临时文件再原子替换，
+    服务进程不会读到写了一半的文件
+    """
+    path = snapshot_path(name)
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{name}-", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def read(path: Path) -> object:
+    """以只读方式映射快照文件并反序列化"""
+    with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        return pickle.loads(m)
+
+
+def cleanup() -> None:
+    """主进程退出时删除快照目录"""
+    if is_publisher() and _snapshot_dir is not None:
+        shutil.rmtree(_snapshot_dir, ignore_errors=True)
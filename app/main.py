@@ -4,27 +4,39 @@ from fastapi import FastAPI
 from fastapi_mcp import FastApiMCP
 
 from app.core.app import Application
+from app.core.rate_limit import MCP_CLIENT_HEADER
 
 
-async def main():
-    app = Application()
-
-    fastapi_app = FastAPI(title="HOYO-INFO-API")
-    await app.set_fastapi_app(fastapi_app)
+def setup(app: Application) -> None:
+    fastapi_app = FastAPI(title="HOYO-INFO-API", lifespan=app.lifespan)
+    app.set_fastapi_app(fastapi_app)
 
     fastapi_mcp = FastApiMCP(
         app.fastapi_app,
         name="Hoyo Info MCP",
         description="0.1.0",
         exclude_tags=["System"],
+        http_client=app.mcp_http_client(),
+        headers=["authorization", MCP_CLIENT_HEADER],
     )
-    await app.set_fastapi_mcp(fastapi_mcp)
+    app.set_fastapi_mcp(fastapi_mcp)
 
+
+def create_app() -> FastAPI:
+    """多进程模式下由各服务进程调用"""
+    app = Application()
+    setup(app)
+    return app.fastapi_app
+
+
+async def main():
+    app = Application()
+    setup(app)
     await app.run()
 
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        asyncio.run(main(), loop_factory=Application.loop_factory())
     except KeyboardInterrupt:
         pass
@@ -0,0 +1,84 @@
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import app_config
+from app.utils.compression import (
+    ENCODERS,
+    THREADPOOL_COMPRESS_SIZE,
+    compress,
+    is_compressible,
+)
+from app.utils.http import select_encoding
+
+
+class CompressionMiddleware:
+    """
+    按 Accept-Encoding 对响应进行 br / zstd / gzip 压缩（可用算法取决于运行环境）。
+
+    只处理一次性发送完整响应体的响应（JSON 接口均是如此），流式响应原样透传；
+    已带有 Content-Encoding 的响应（如缓存中预压缩的内容）不会被重复压缩。
+    """
+
+    def __init__(self, app: ASGIApp, min_size: int | None = None) -> None:
+        self.app = app
+        self.min_size = (
+            app_config.compression_min_size if min_size is None else min_size
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = select_encoding(
+            Headers(scope=scope).get("accept-encoding", ""), list(ENCODERS)
+        )
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Message | None = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            if (
+                message.get("more_body", False)
+                or "content-encoding" in headers
+                or not is_compressible(headers.get("content-type", ""))
+                or len(body) < self.min_size
+            ):
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            if len(body) > THREADPOOL_COMPRESS_SIZE:
+                compressed = await run_in_threadpool(compress, body, encoding)
+            else:
+                compressed = compress(body, encoding)
+            headers.add_vary_header("Accept-Encoding")
+            if len(compressed) < len(body):
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(compressed))
+                body = compressed
+            passthrough = True
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,120 @@
+from email.utils import format_datetime
+from typing import Callable, TypeVar
+
+from fastapi.responses import Response
+from starlette.datastructures import Headers, MutableHeaders, QueryParams
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.base_data import BaseData
+from app.core.config import app_config
+from app.utils.http import etag_matches, not_modified_since
+
+F = TypeVar("F", bound=Callable)
+
+# 添加校验信息及 Cache-Control 的响应状态码
+_VALIDATED_STATUSES = (200, 304)
+
+
+def self_validating(*unless: str) -> Callable[[F], F]:
+    """
+    标记自行处理条件请求的路由：响应带有自己的 ETag（RSS/ICS 文件、结果随时间变化的接口），
+    条件请求交给路由判断。请求带有 unless 中的任一查询参数时结果只取决于数据版本，
+    仍使用数据集级别的校验信息
+    """
+
+    def decorator(endpoint: F) -> F:
+        endpoint.self_validating_unless = unless
+        return endpoint
+
+    return decorator
+
+
+def _resolve_route(scope: Scope) -> tuple[BaseRoute | None, Scope]:
+    """在进入路由处理之前按路由表匹配请求，未匹配时返回 (None, {})"""
+    for route in scope["app"].router.routes:
+        match, child_scope = route.matches(scope)
+        if match == Match.FULL:
+            return route, child_scope
+    return None, {}
+
+
+def _validates_itself(route: BaseRoute, scope: Scope) -> bool:
+    unless = getattr(getattr(route, "endpoint", None), "self_validating_unless", None)
+    if unless is None:
+        return False
+    query_params = QueryParams(scope["query_string"])
+    return not any(name in query_params for name in unless)
+
+
+class ConditionalGetMiddleware:
+    """
+    为数据接口（路径前缀与数据集名称一致）添加 ETag / Last-Modified / Cache-Control，
+    请求携带的校验信息与当前数据版本一致时直接返回 304，不执行路由处理、编码及压缩
+    （纯 ASGI 实现）。以 self_validating 标记的路由自行处理条件请求，只补充 Cache-Control。
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        prefix = scope["path"].lstrip("/").split("/", 1)[0]
+        dataset = BaseData.datasets.get(prefix)
+        if dataset is None:
+            await self.app(scope, receive, send)
+            return
+
+        # 在处理请求之前读取版本：处理期间数据被更新时，新数据会带上旧版本号，
+        # 客户端下次请求仍会重新获取；反之若把新版本号标记到旧数据上，旧数据会被一直缓存
+        etag = f'W/"{dataset.version}"'
+        last_modified = format_datetime(dataset.last_modified, usegmt=True)
+        cache_control = (
+            f"public, max-age={app_config.cache_max_age}, "
+            f"stale-while-revalidate={app_config.cache_stale_while_revalidate}"
+        )
+
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        if_modified_since = request_headers.get("if-modified-since")
+        if if_none_match is not None:
+            not_modified = etag_matches(if_none_match, etag)
+        elif if_modified_since is not None:
+            not_modified = not_modified_since(if_modified_since, dataset.last_modified)
+        else:
+            not_modified = False
+
+        if not_modified:
+            route, child_scope = _resolve_route(scope)
+            if route is not None and not _validates_itself(route, scope):
+                # 写入匹配到的路由，指标按路由模板统计这些请求
+                scope.update(child_scope)
+                response = Response(
+                    status_code=304,
+                    headers={
+                        "Cache-Control": cache_control,
+                        "ETag": etag,
+                        "Last-Modified": last_modified,
+                        "Vary": "Accept-Encoding",
+                    },
+                )
+                await response(scope, receive, send)
+                return
+
+        async def send_wrapper(message: Message) -> None:
+            if (
+                message["type"] == "http.response.start"
+                and message["status"] in _VALIDATED_STATUSES
+            ):
+                headers = MutableHeaders(scope=message)
+                headers.setdefault("Cache-Control", cache_control)
+                # 路由自行给出 ETag 时（如 RSS/ICS 的强 ETag、与当前时间相关的结果），
+                # 由路由处理条件请求，不使用数据集级别的校验信息
+                if "etag" not in headers:
+                    headers["ETag"] = etag
+                    headers["Last-Modified"] = last_modified
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -1,40 +1,91 @@
+import random
 import time
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from loguru import logger
 from urllib.parse import unquote
 
+from loguru import logger
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import app_config
+
+# 不记录访问日志的路径（例如 health check、指标抓取）
+_EXCLUDED_PATHS = frozenset({"/health", "/metrics"})
+
+
+class TrafficLogMiddleware:
+    """
+    访问日志（纯 ASGI 实现，不为每个请求额外创建任务和内存流）。
+
+    - 耗时使用单调时钟，从收到请求到响应体最后一段发送完毕，流式响应同样准确
+    - 4xx / 5xx 以及耗时超过 ACCESS_LOG_SLOW_MS 的请求总是记录，
+      其余请求按 ACCESS_LOG_SAMPLE_RATE 采样记录
+    - 只有需要记录时才格式化日志内容
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float | None = None,
+        slow_ms: float | None = None,
+    ) -> None:
+        self.app = app
+        self.sample_rate = (
+            app_config.access_log_sample_rate if sample_rate is None else sample_rate
+        )
+        self.slow_ms = app_config.access_log_slow_ms if slow_ms is None else slow_ms
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in _EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        logged = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, logged
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                logged = True
+                self.log(scope, status_code, start_time)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 处理过程中抛出异常或未发送完整响应时，按 500 记录
+            if not logged:
+                self.log(scope, 500 if status_code < 400 else status_code, start_time)
+
+    def log(self, scope: Scope, status_code: int, start_time: float) -> None:
+        process_time = (time.perf_counter() - start_time) * 1000
+        if (
+            status_code < 400
+            and process_time < self.slow_ms
+            and (self.sample_rate <= 0 or random.random() >= self.sample_rate)
+        ):
+            return
+
+        client = scope.get("client")
+        parts = [
+            client[0] if client else "-",
+            scope["method"],
+            str(status_code),
+            f"{process_time:.2f}ms",
+            scope["path"],
+        ]
+        query_string = scope.get("query_string", b"")
+        if query_string:
+            parts.append(unquote(query_string.decode("latin-1")))
+        log_msg = " | ".join(parts)
 
-class TrafficLogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-
-        # 1. 处理请求
-        response = await call_next(request)
-
-        # 2. 计算耗时
-        process_time = (time.time() - start_time) * 1000
-
-        # 3. 构造日志内容
-        # 排除不需要记录的路径（例如 health check 或 metrics）
-        if request.url.path != "/health":
-            parts = [
-                request.client.host,
-                request.method,
-                str(response.status_code),
-                f"{process_time:.2f}ms",
-                request.url.path,
-            ]
-            if request.url.query:
-                parts.append(str(unquote(request.url.query)))
-            log_msg = " | ".join(parts)
-
-            # 根据状态码决定日志级别
-            if response.status_code >= 500:
-                logger.error(log_msg)
-            elif response.status_code >= 400:
-                logger.warning(log_msg)
-            else:
-                logger.info(log_msg)
-
-        return response
+        # 根据状态码决定日志级别，慢请求至少为 WARNING
+        if status_code >= 500:
+            logger.error(log_msg)
+        elif status_code >= 400 or process_time >= self.slow_ms:
+            logger.warning(log_msg)
+        else:
+            logger.info(log_msg)
@@ -0,0 +1,69 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.loop_monitor import current_request
+from app.core.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    HTTP_RESPONSE_SIZE,
+)
+
+# 不统计的路径（抓取指标本身）
+_EXCLUDED_PATHS = frozenset({"/metrics"})
+# 未匹配到路由的请求（如 404）统一归入该标签，避免路径数量无限增长
+_UNMATCHED_ROUTE = "unmatched"
+
+
+def _route_label(scope: Scope) -> str:
+    # 路由匹配后 FastAPI 会把路由对象写入 scope，路径为模板形式
+    return getattr(scope.get("route"), "path", _UNMATCHED_ROUTE)
+
+
+class MetricsMiddleware:
+    """
+    按路由统计请求数、耗时、响应体大小及进行中的请求数（纯 ASGI 实现）。
+    需位于压缩中间件外层，统计的是实际发送的字节数
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in _EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+        response_size = 0
+        completed = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size, completed
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+                if not message.get("more_body", False):
+                    completed = True
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        token = current_request.set(scope)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # 处理过程中抛出异常或未发送完整响应时，按 500 统计
+            if not completed and status_code < 400:
+                status_code = 500
+            method = scope["method"]
+            route = _route_label(scope)
+            HTTP_REQUESTS.inc(method, route, str(status_code))
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start_time, method, route
+            )
+            HTTP_RESPONSE_SIZE.observe(response_size, method, route)
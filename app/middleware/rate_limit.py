@@ -0,0 +1,45 @@
+from fastapi.responses import JSONResponse
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.rate_limit import (
+    DEFAULT_CLASS,
+    MCP_CLIENT_HEADER,
+    MCP_PATH_PREFIXES,
+    RateLimitedError,
+    check_rate,
+    client_ip,
+)
+
+# 不限流的路径（健康检查、指标抓取）
+_EXCLUDED_PATHS = frozenset({"/health", "/metrics"})
+
+
+class RateLimitMiddleware:
+    """
+    按客户端 IP 对所有请求限流（纯 ASGI 实现），超出时直接返回 429，
+    不进入路由处理。耗时请求另由 app.core.rate_limit.expensive_call 限制。
+    MCP 请求会带上客户端 IP，供其触发的进程内工具调用按该客户端限流
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in _EXCLUDED_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        client = client_ip(scope)
+        if scope["path"].startswith(MCP_PATH_PREFIXES):
+            # 覆盖而不是追加，客户端自行发送的同名请求头不会生效
+            MutableHeaders(scope=scope)[MCP_CLIENT_HEADER] = client
+        try:
+            check_rate(DEFAULT_CLASS, client)
+        except RateLimitedError as e:
+            response = JSONResponse(
+                {"detail": e.detail}, status_code=e.status_code, headers=e.headers
+            )
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
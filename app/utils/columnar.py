@@ -0,0 +1,28 @@
+# 跨进程传递大量字符串/整数时使用的紧凑列式表示
+from array import array
+from typing import Iterable, Iterator
+
+
+def pack_strings(strings: Iterable[str]) -> tuple[bytes, array]:
+    """
+    将字符串序列拼接为一个 UTF-8 字节串及各字符串的结束偏移。
+    反序列化时只需复制两块连续内存，而不是逐个创建字符串对象
+    """
+    chunks = []
+    offsets = array("Q")
+    end = 0
+    for string in strings:
+        chunk = string.encode("utf-8")
+        chunks.append(chunk)
+        end += len(chunk)
+        offsets.append(end)
+    return b"".join(chunks), offsets
+
+
+def unpack_strings(packed: tuple[bytes, array]) -> Iterator[str]:
+    """逐个还原 pack_strings 打包的字符串"""
+    blob, offsets = packed
+    start = 0
+    for end in offsets:
+        yield blob[start:end].decode("utf-8")
+        start = end
@@ -0,0 +1,58 @@
+import gzip
+from typing import Callable
+
+# brotli 已在 pyproject.toml 中声明，zstd 来自 Python 3.14+ 标准库；
+# 任一不可用时跳过对应编码，两者都不可用时只使用 gzip
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+
+# 超过该大小的内容在线程池中压缩，避免阻塞事件循环
+THREADPOOL_COMPRESS_SIZE = 64 * 1024
+
+# 可被压缩的内容类型前缀
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/xml",
+    "application/rss+xml",
+    "text/",
+)
+
+
+def _gzip(body: bytes, best: bool) -> bytes:
+    return gzip.compress(body, compresslevel=9 if best else 6, mtime=0)
+
+
+def _brotli(body: bytes, best: bool) -> bytes:
+    return brotli.compress(body, quality=11 if best else 5)
+
+
+def _zstd(body: bytes, best: bool) -> bytes:
+    return zstd.compress(body, level=19 if best else 3)
+
+
+# 可用的压缩算法，按服务端偏好排序
+ENCODERS: dict[str, Callable[[bytes, bool], bytes]] = {}
+if brotli is not None:
+    ENCODERS["br"] = _brotli
+if zstd is not None:
+    ENCODERS["zstd"] = _zstd
+ENCODERS["gzip"] = _gzip
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    按指定编码压缩；best 为 True 时使用最高压缩率（适合加载时一次性预压缩），
+    否则使用速度与压缩率均衡的参数（适合请求时压缩）
+    """
+    return ENCODERS[encoding](body, best)
+
+
+def is_compressible(content_type: str) -> bool:
+    return content_type.lower().startswith(COMPRESSIBLE_TYPES)
@@ -4,6 +4,7 @@ from typing import Callable
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 from watchdog.observers import Observer
 
+from app.core.metrics import WATCHER_CALLBACK_ERRORS, WATCHER_EVENTS
 from app.utils.logger import get_logger
 
 logger = get_logger("WATCHER")
@@ -43,6 +44,7 @@ class DirectoryChangeHandler(FileSystemEventHandler):
                 try:
                     callback(file_path)
                 except Exception as e:
+                    WATCHER_CALLBACK_ERRORS.inc()
                     # 关键：捕获回调中的异常，防止后台线程崩溃导致监听停止
                     logger.error(f"执行回调时发生错误 {file_path}: {e}", exc_info=True)
                 finally:
@@ -56,22 +58,33 @@ class DirectoryChangeHandler(FileSystemEventHandler):
             timer.start()
             logger.debug(f"计划执行任务: {file_path} (延迟 {self.debounce_seconds}s)")
 
+    def cancel_pending(self) -> None:
+        """取消所有尚未执行的定时器"""
+        with self._timer_lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+
     def on_created(self, event: FileSystemEvent) -> None:
+        WATCHER_EVENTS.inc("created")
         logger.info(f"创建文件: {event.src_path}")
         self._debounce_trigger(Path(event.src_path), self.load_file)
 
     def on_modified(self, event: FileSystemEvent) -> None:
+        WATCHER_EVENTS.inc("modified")
         logger.info(f"修改文件: {event.src_path}")
         self._debounce_trigger(Path(event.src_path), self.load_file)
 
     def on_deleted(self, event: FileSystemEvent) -> None:
+        WATCHER_EVENTS.inc("deleted")
         logger.info(f"删除文件: {event.src_path}")
         self.on_file_deleted(Path(event.src_path))
 
     def on_moved(self, event: FileSystemEvent) -> None:
+        WATCHER_EVENTS.inc("moved")
         logger.info(f"移动文件: {event.src_path} -> {event.dest_path}")
         self.on_file_deleted(Path(event.src_path))
-        self._debounce_trigger(Path(event.src_path), self.load_file)
+        self._debounce_trigger(Path(event.dest_path), self.load_file)
 
 
 class DirWatcher:
@@ -101,12 +114,16 @@ class DirWatcher:
             self.handler, path=self.watch_dir, recursive=self.recursive
         )
         self.observer.start()
-        logger.info(f"开始监控目录: {self.watch_dir.relative_to(Path.cwd())}")
+        if self.watch_dir.is_relative_to(Path.cwd()):
+            display_dir = self.watch_dir.relative_to(Path.cwd())
+        else:
+            display_dir = self.watch_dir
+        logger.info(f"开始监控目录: {display_dir}")
 
     def stop(self) -> None:
         """停止监控"""
         if self.observer and self.observer.is_alive():
-            self.handler.flush()
+            self.handler.cancel_pending()
             self.observer.stop()
             self.observer.join()
             logger.info(f"停止监控目录: {self.watch_dir}")
@@ -0,0 +1,63 @@
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """按 If-None-Match 的弱比较规则判断 ETag 是否匹配（忽略 W/ 前缀）"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque_tag = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque_tag for tag in if_none_match.split(",")
+    )
+
+
+def not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    """If-Modified-Since 不早于 last_modified 时返回 True；无法解析或不带时区时视为已修改"""
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified <= since
+
+
+def parse_accept_encoding(accept_encoding: str) -> dict[str, float]:
+    """
+    解析 Accept-Encoding，返回 {编码: q 值}。
+    q 值非法的项按 0 处理；未出现的编码由调用方结合 '*' 判断。
+    """
+    encodings: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[coding] = quality
+    return encodings
+
+
+def select_encoding(accept_encoding: str, available: list[str]) -> str | None:
+    """
+    从 available（按服务端偏好排序）中选出客户端接受且 q 值最高的编码，
+    都不接受时返回 None，表示使用原始内容。
+    """
+    if not accept_encoding:
+        return None
+    encodings = parse_accept_encoding(accept_encoding)
+    wildcard = encodings.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in available:
+        quality = encodings.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
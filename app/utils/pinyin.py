@@ -0,0 +1,19 @@
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:  # 已在 pyproject.toml 中声明；导入失败时不提供拼音补全
+    lazy_pinyin = None
+
+
+def pinyin_keys(text: str) -> list[str]:
+    """
+    返回文本的 [全拼, 拼音首字母]，用于拼音补全；
+    未安装 pypinyin 或文本不含汉字时返回空列表
+    """
+    if lazy_pinyin is None:
+        return []
+    syllables = [syllable.lower() for syllable in lazy_pinyin(text) if syllable]
+    full = "".join(syllables)
+    if full == text.lower():
+        return []
+    initials = "".join(syllable[0] for syllable in syllables)
+    return [full, initials]
@@ -0,0 +1,164 @@
+# 前缀补全索引
+import heapq
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterable, Sequence
+
+from app.utils.columnar import pack_strings, unpack_strings
+
+# 单次补全最多返回的条数
+MAX_SUGGESTIONS = 20
+# 匹配超过该数量后缀的前缀在构建时预先计算结果，查询时遍历的区间不超过该值
+_HOT_RANGE_SIZE = 256
+
+
+def _text_start(text: str) -> Iterable[int]:
+    return (0,)
+
+
+class PrefixIndex:
+    """
+    基于排序后缀数组的前缀补全索引。
+
+    每个条目为 (已规范化的文本, 值ID)，starts 给出文本中可作为补全起点的位置
+    （默认只有开头）。所有起点处的后缀按字典序排序，以 (条目下标, 偏移) 保存；
+    查询时用二分查找定位以前缀开头的连续区间，再按分数取前 k 个不重复的值ID。
+    匹配区间很大的前缀（通常是较短的前缀）的结果在构建时预先计算。
+    """
+
+    __slots__ = (
+        "texts",
+        "suffix_entries",
+        "suffix_offsets",
+        "suffix_ranks",
+        "order",
+        "hot",
+    )
+
+    def __init__(
+        self,
+        entries: Iterable[tuple[str, int]],
+        scores: Sequence[float],
+        starts: Callable[[str], Iterable[int]] = _text_start,
+    ) -> None:
+        # 值ID按分数从高到低排名，分数相同时值ID小的优先，保证结果稳定；
+        # 查询时对排名取最小的 k 个即可，无需再比较分数
+        self.order = sorted(
+            range(len(scores)), key=lambda owner: (-scores[owner], owner)
+        )
+        rank_of = [0] * len(scores)
+        for rank, owner in enumerate(self.order):
+            rank_of[owner] = rank
+
+        self.texts: list[str] = []
+        suffixes = []
+        for text, owner in entries:
+            if not text:
+                continue
+            entry = len(self.texts)
+            self.texts.append(text)
+            suffixes.extend(
+                (text[offset:], entry, offset, rank_of[owner])
+                for offset in starts(text)
+            )
+        suffixes.sort()
+        self.suffix_entries = array("I", (suffix[1] for suffix in suffixes))
+        self.suffix_offsets = array("I", (suffix[2] for suffix in suffixes))
+        self.suffix_ranks = array("I", (suffix[3] for suffix in suffixes))
+        self.hot = self._build_hot([suffix[0] for suffix in suffixes])
+
+    def _build_hot(self, keys: list[str]) -> dict[str, list[int]]:
+        """
+        找出匹配超过 _HOT_RANGE_SIZE 个后缀的前缀并预先计算结果。
+        长度为 n+1 的前缀区间包含在长度为 n 的区间内，只需在上一轮的大区间中细分；
+        区间内第 _HOT_RANGE_SIZE 个之后的后缀仍以该前缀开头即为大区间，
+        各区间的边界用二分查找确定，无需逐个比较。
+        """
+        hot: dict[str, list[int]] = {}
+        ranges = [(0, len(keys))]
+        length = 0
+        while ranges:
+            length += 1
+
+            def key(text: str) -> str:
+                return text[:length]
+
+            next_ranges = []
+            for lo, hi in ranges:
+                i = lo
+                while i < hi:
+                    if len(keys[i]) < length:
+                        i += 1
+                        continue
+                    prefix = keys[i][:length]
+                    j = i + _HOT_RANGE_SIZE
+                    if j < hi and keys[j].startswith(prefix):
+                        end = bisect_right(keys, prefix, j, hi, key=key)
+                        hot[prefix] = self._top(i, end, MAX_SUGGESTIONS)
+                        next_ranges.append((i, end))
+                    else:
+                        end = bisect_right(keys, prefix, i, min(j, hi), key=key)
+                    i = end
+            ranges = next_ranges
+        return hot
+
+    def __getstate__(self) -> dict:
+        """跨进程传递时将文本与预先计算的结果打包为字节串和整数数组"""
+        hot_ends = array("Q")
+        hot_owners = array("I")
+        for owners in self.hot.values():
+            hot_owners.extend(owners)
+            hot_ends.append(len(hot_owners))
+        return {
+            "texts": pack_strings(self.texts),
+            "suffix_entries": self.suffix_entries,
+            "suffix_offsets": self.suffix_offsets,
+            "suffix_ranks": self.suffix_ranks,
+            "order": array("I", self.order),
+            "hot_prefixes": pack_strings(self.hot),
+            "hot_ends": hot_ends,
+            "hot_owners": hot_owners,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.texts = list(unpack_strings(state["texts"]))
+        self.suffix_entries = state["suffix_entries"]
+        self.suffix_offsets = state["suffix_offsets"]
+        self.suffix_ranks = state["suffix_ranks"]
+        self.order = state["order"].tolist()
+        hot_owners = state["hot_owners"]
+        self.hot = {}
+        start = 0
+        for prefix, end in zip(
+            unpack_strings(state["hot_prefixes"]), state["hot_ends"]
+        ):
+            self.hot[prefix] = hot_owners[start:end].tolist()
+            start = end
+
+    def _suffix_prefix(self, position: int, length: int) -> str:
+        text = self.texts[self.suffix_entries[position]]
+        offset = self.suffix_offsets[position]
+        return text[offset : offset + length]
+
+    def _top(self, lo: int, hi: int, limit: int) -> list[int]:
+        ranks = heapq.nsmallest(limit, set(self.suffix_ranks[lo:hi]))
+        return [self.order[rank] for rank in ranks]
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[int]:
+        """以 prefix 开头的条目对应的值ID，按分数从高到低，最多 limit 个"""
+        if not prefix:
+            return []
+        limit = min(limit, MAX_SUGGESTIONS)
+        if prefix in self.hot:
+            return self.hot[prefix][:limit]
+
+        # 后缀有序，截取相同长度后仍然有序，可直接对截取结果二分
+        length = len(prefix)
+
+        def key(position: int) -> str:
+            return self._suffix_prefix(position, length)
+
+        positions = range(len(self.suffix_entries))
+        lo = bisect_left(positions, prefix, key=key)
+        hi = bisect_right(positions, prefix, lo=lo, key=key)
+        return self._top(lo, hi, limit)
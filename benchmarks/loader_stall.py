@@ -0,0 +1,107 @@
+"""
+测量接收加载结果/快照时事件循环被阻塞的时长。
+
+生成指定数量视频的 data.json，在工作线程中分别执行：
+- json.load：直接在服务进程中解析原始数据
+- pickle.loads：反序列化加载进程返回的索引（与服务进程读取快照相同）
+
+同时在事件循环中每 1ms 调度一次，记录两次调度之间的最大间隔，即最长阻塞时间。
+
+用法：uv run python -m benchmarks.loader_stall [视频数量]
+"""
+
+import asyncio
+import json
+import pickle
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+
+from app.api.hoyo_video.index import load_video_data
+
+GAMES = ("原神", "崩坏：星穹铁道", "绝区零")
+TYPES = ("角色PV", "剧情PV", "版本PV", "EP", "其他")
+NAMES = ("Alpha", "Beta", "芙宁娜", "可莉", "流萤")
+
+
+def generate(path: Path, count: int) -> None:
+    random.seed(0)
+    data = {"update_time": "2025-01-01 10:00:00", "data": {}}
+    for weight, game in enumerate(GAMES):
+        videos = []
+        for i in range(count // len(GAMES)):
+            video_id = weight * count + i
+            videos.append(
+                {
+                    "id": video_id,
+                    "title": f"{game} 角色演示 Trailer {random.choice(NAMES)} {i}",
+                    "time": f"20{random.randint(20, 25)}-{random.randint(1, 12):02d}-"
+                    f"{random.randint(1, 28):02d} {random.randint(0, 23):02d}:00:00",
+                    "type": random.sample(TYPES, random.randint(0, 2)),
+                    "src": f"https://example.com/video/{video_id}.mp4",
+                    "cover": f"https://example.com/cover/{video_id}.png",
+                    "intro": f"{game} 视频简介 {i}",
+                    "game": game,
+                }
+            )
+        data["data"][game] = {
+            "weight": weight,
+            "news_detail_url": "",
+            "video_types": list(TYPES[:-1]),
+            "videos": videos,
+        }
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+async def measure(func: Callable[[], object]) -> tuple[float, float]:
+    """在工作线程中执行 func，返回 (执行耗时, 事件循环最长调度间隔)，单位秒"""
+    done = threading.Event()
+    elapsed = 0.0
+
+    def run() -> None:
+        nonlocal elapsed
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        done.set()
+
+    thread = threading.Thread(target=run)
+    max_gap = 0.0
+    last = time.perf_counter()
+    thread.start()
+    while not done.is_set():
+        await asyncio.sleep(0.001)
+        now = time.perf_counter()
+        max_gap = max(max_gap, now - last)
+        last = now
+    thread.join()
+    return elapsed, max_gap
+
+
+async def main(count: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / "data.json"
+        generate(path, count)
+        result = load_video_data(path)
+        payload = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"视频数量: {count}，data.json {path.stat().st_size / 1e6:.1f}MB，")
+        print(f"索引序列化后 {len(payload) / 1e6:.1f}MB")
+
+        cases = {
+            "json.load": lambda: json.loads(path.read_bytes()),
+            "pickle.loads": lambda: pickle.loads(payload),
+        }
+        for name, func in cases.items():
+            elapsed, max_gap = await measure(func)
+            print(
+                f"{name:<14} 耗时 {elapsed * 1000:8.1f}ms，"
+                f"事件循环最长阻塞 {max_gap * 1000:8.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 40000))